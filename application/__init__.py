@@ -6,6 +6,7 @@
 import os
 import sys
 import logging
+import multiprocessing
 from datetime import datetime
 from pprint import pformat
 from jinja2 import StrictUndefined
@@ -16,6 +17,8 @@ from flask_login import LoginManager
 from flask_mail import Mail
 from flask_bootstrap import Bootstrap
 from flask_mongoengine import MongoEngine
+from flask_mongoengine.connection import get_connection_settings
+import mongoengine
 from flask_admin.contrib.fileadmin import FileAdmin
 
 
@@ -104,6 +107,38 @@ except ImportError:
     db = MongoEngine(app)
 
 
+def reconnect_db(max_pool_size=None):
+    """
+    Open new Database Connections.
+    Needed in forked processes, the Connections of the parent are not fork-safe
+    """
+    for settings in get_connection_settings(app.config):
+        settings.setdefault('alias', mongoengine.DEFAULT_CONNECTION_NAME)
+        settings.setdefault('uuidRepresentation', 'standard')
+        if max_pool_size:
+            settings['maxPoolSize'] = max_pool_size
+        mongoengine.disconnect(settings['alias'])
+        mongoengine.connect(**settings)
+
+
+def _init_pool_worker(initializer, initargs):
+    """
+    Initializer of the Workers of create_pool()
+    """
+    reconnect_db(app.config['PROCESS_POOL_DB_CONNECTIONS'])
+    if initializer:
+        initializer(*initargs)
+
+
+def create_pool(processes=None, initializer=None, initargs=()):
+    """
+    Process Pool, every Worker opens its own Database Connection
+    with at most PROCESS_POOL_DB_CONNECTIONS Connections.
+    Use this instead of multiprocessing.Pool()
+    """
+    return multiprocessing.Pool(processes, _init_pool_worker, (initializer, initargs))
+
+
 from application.helpers.sates import get_changes
 
 
@@ -175,6 +210,9 @@ admin.add_view(CustomAttributeView(CustomAttributeRule, name="Global Custom Attr
 admin.add_sub_category(name="Checkmk", parent_name="Modules")
 admin.add_link(MenuLink(name='Debug Config', category='Checkmk',
                         url=f"{app.config['BASE_PREFIX']}admin/checkmkrule/debug"))
+from application.modules.rule.models import RuleProfile
+from application.modules.rule.views import RuleCostView
+admin.add_view(RuleCostView(RuleProfile, name="Rule Cost", category="Checkmk"))
 
 from application.modules.checkmk.models import CheckmkRule, CheckmkGroupRule, CheckmkFilterRule
 from application.modules.checkmk.views import CheckmkRuleView, CheckmkGroupRuleView
@@ -5,12 +5,14 @@ Ansible Api
 # pylint: disable=no-member
 from datetime import datetime, timedelta
 from mongoengine.errors import DoesNotExist
+from flask import request
 from flask_restx import Namespace, Resource
 
 from application.api import require_token
 from application.modules.log.models import LogEntry
 from application.models.host import Host
 from application.models.cron import CronStats
+from application.modules.rule.models import RuleProfile
 
 API = Namespace('syncer')
 
@@ -116,3 +118,37 @@ class SyncerHostsApi(Resource):
             'not_updated_last_24h': Host.objects(is_object=False,
                                                  last_import_seen__lt=ago_24h).count(),
         }, 200
+
+
+@API.route('/rule_cost')
+@API.param('run_id', "Run to show, default is the latest")
+class SyncerRuleCostApi(Resource):
+    """ Handle Actions """
+
+    @require_token
+    def get(self):
+        """Return Rule Profile of a run, most expensive Rules first"""
+        run_id = request.args.get('run_id')
+        if not run_id:
+            latest = RuleProfile.objects().order_by('-last_update').first()
+            if not latest:
+                return {'error': "No Rule Profile found"}, 404
+            run_id = latest.run_id
+        response = []
+        for entry in RuleProfile.objects(run_id=run_id).order_by('-total_ns'):
+            response.append({
+                'rule_class': entry.rule_class,
+                'rule_id': entry.rule_id,
+                'rule_name': entry.rule_name,
+                'evaluations': entry.evaluations,
+                'hits': entry.hits,
+                'condition_ms': entry.condition_ns / 1000000,
+                'outcome_ms': entry.outcome_ns / 1000000,
+                'total_ms': entry.total_ns / 1000000,
+            })
+        if not response:
+            return {'error': "No Rule Profile found"}, 404
+        return {
+            'run_id': run_id,
+            'result': response,
+        }, 200
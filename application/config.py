@@ -46,6 +46,10 @@ class BaseConfig():
     LOWERCASE_HOSTNAMES = False
     LABELS_ITERATE_FIRST_LEVEL = False
     LABELS_IMPORT_EMPTY = True
+    # Number of Hosts loaded and written together during Imports
+    IMPORT_BATCH_SIZE = 1000
+    # Number of Hosts loaded together during Exports
+    HOST_ITER_BATCH_SIZE = 1000
 
     REPLACERS = [
       (' ', '_'),
@@ -68,11 +72,35 @@ class BaseConfig():
 
     HTTP_REPEAT_TIMEOUT = 3
     HTTP_MAX_RETRIES = 2
+    # Connections kept alive per Server in the HTTP Session of a Plugin
+    HTTP_POOL_SIZE = 20
+    # Compress JSON Request Bodies bigger than this number of Bytes with gzip,
+    # 0 disables it. The API of the Target needs to accept gzip encoded Requests.
+    HTTP_COMPRESS_REQUESTS_MIN_SIZE = 0
+
+    # Number of compiled Jinja Templates kept in Memory
+    JINJA_TEMPLATE_CACHE_SIZE = 2000
 
     SWAGGER_ENABLED = True
     DEBUG = True
     ADVANCED_RULE_DEBUG = False
 
+    # Every nth Host evaluation is measured to collect
+    # Cost and Hit Statistics of the Rule Conditions. 0 disables it.
+    # Measured Hosts evaluate all Conditions, so it costs some time
+    RULE_STATS_SAMPLE_RATE = 0
+    # Conditions of a Rule are reordered by their Statistics,
+    # once all of them have at least that many samples
+    RULE_STATS_MIN_SAMPLES = 100
+    # Number of Rule Outcomes shared between Hosts with the same Attributes.
+    # 0 disables the shared Outcome Cache.
+    # Every miss costs Database Requests, so it only helps
+    # if many Hosts have the same Attributes
+    RULE_OUTCOME_CACHE_SIZE = 0
+    # Measure Evaluations, Hits and Time of every single Rule.
+    # Results are shown as Rule Cost in the GUI and the API
+    RULE_PROFILING = False
+
     MONGODB_SETTINGS = {
         'db': 'cmdb-api',
         'host': '127.0.0.1',
@@ -107,12 +135,40 @@ class BaseConfig():
     # This should prevent db timeouts for slow cmk operations.
     # but needs more RAM.
     CMK_COLLECT_BULK_OPERATIONS = False
+    # Bulk Requests to Checkmk which are sent at the same time
+    CMK_BULK_MAX_IN_FLIGHT = 4
+    # Fetch the Folders and Hosts of Checkmk in the Background,
+    # while the Rules for the Hosts are calculated
+    CMK_PIPELINED_RUN = False
+    # Store a Fingerprint per Host and Account after the Export,
+    # and skip Hosts where neither the Syncer nor Checkmk changed
+    CMK_EXPORT_FINGERPRINTS = True
 
     # Checkmk API will break for get_hosts at some point
     # In the example it was at 50k hosts.
     # Activating this, Syncer will query Hosts Folder by Folder.
     # That will take longer, but will not break Checkmk.
     CMK_GET_HOST_BY_FOLDER = False
+    # Folders which are fetched at the same time,
+    # should not be bigger than HTTP_POOL_SIZE
+    CMK_FOLDER_FETCH_IN_FLIGHT = 10
+    # Retries for a Folder which could not be fetched
+    CMK_FOLDER_FETCH_RETRIES = 2
+
+    # Calculate the Host Rules in the main process,
+    # with every Rule evaluated for a batch of Hosts at once,
+    # instead of Host by Host in a process pool.
+    CMK_BATCH_RULE_EVALUATION = False
+    # Number of Hosts evaluated together in batch mode
+    RULE_BATCH_SIZE = 5000
+    # Worker Processes for the Calculation of the Host Rules, 0 uses all CPUs
+    CMK_CALCULATION_WORKERS = 0
+    # Number of Hosts a Worker Process loads and calculates at once
+    CMK_CALCULATION_CHUNK_SIZE = 200
+    # Seconds to wait for the next calculated Chunk. Unlike PROCESS_TIMEOUT,
+    # which only logged the Host, a Timeout stops the whole Export,
+    # since the Cleanup would delete the Hosts of the missing Chunk
+    CMK_CHUNK_TIMEOUT = 300
 
     # Log all Changed done on Hosts
     CMK_DETAILED_LOG = False
@@ -121,6 +177,8 @@ class BaseConfig():
     CMK_JINJA_USE_REPLACERS_FOR_HOSTNAMES = False
 
     PROCESS_TIMEOUT = 15
+    # Database Connections each Worker of a Process Pool may open
+    PROCESS_POOL_DB_CONNECTIONS = 2
 
 class ProductionConfig(BaseConfig):
     """
@@ -0,0 +1,46 @@
+"""
+Helper for HTTP Sessions
+"""
+import gzip
+import json
+import requests
+from requests.adapters import HTTPAdapter
+
+from application import app
+
+
+def create_session(pool_size=None):
+    """
+    Session which keeps the Connections alive and reuses them,
+    so the TCP and TLS Handshake is only needed once per Connection.
+    Sessions are not fork-safe, every Process needs its own.
+    """
+    if not pool_size:
+        pool_size = app.config['HTTP_POOL_SIZE']
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+def compress_json(data, headers):
+    """
+    Returns the JSON Body gzip compressed, with the matching Headers,
+    if it is bigger than HTTP_COMPRESS_REQUESTS_MIN_SIZE.
+    Else None
+    """
+    min_size = app.config['HTTP_COMPRESS_REQUESTS_MIN_SIZE']
+    if not min_size:
+        return None
+    body = json.dumps(data).encode('utf-8')
+    if len(body) < min_size:
+        return None
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    headers['Content-Encoding'] = 'gzip'
+    return gzip.compress(body, compresslevel=6), headers
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Import Helpers
+"""
+#pylint: disable=protected-access
+import copy
+import datetime
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from application import app
+from application.models.host import Host, HostCache
+from application.modules.debug import ColorCodes as CC
+
+# Changes which happen on every Import and are no Update of the Host
+SEEN_FIELDS = ['last_import_seen']
+# Fields needed to know if a Host is unchanged
+SEEN_ONLY_FIELDS = ['hostname', 'labels_hash', 'available', 'is_object', 'object_type',
+                    'source_account_id', 'source_account_name', 'inventory.syncer_account']
+
+
+def default_update(host_obj, labels):
+    """
+    Update Labels of the Host
+    """
+    host_obj.update_host(labels)
+
+
+def is_seen_only(raw, labels, config):
+    """
+    Check if the Import would change nothing on the Host but last_import_seen.
+    The Labels are compared by their Hash, so only the small fields
+    of the Host need to be loaded.
+    """
+    return raw.get('available') \
+        and raw.get('source_account_id') == config['id'] \
+        and raw.get('source_account_name') == config['name'] \
+        and raw.get('is_object', False) == config.get('is_object', False) \
+        and raw.get('object_type') == config.get('object_type', 'undefined') \
+        and raw.get('inventory', {}).get('syncer_account') == config['name'] \
+        and raw.get('labels_hash') == Host.hash_labels(Host.normalize_labels(labels))
+
+
+def _find_seen_only(batch, config):
+    """
+    Remove the unchanged Hosts from the Batch,
+    returns their ids
+    """
+    seen_ids = []
+    for raw in Host.objects(hostname__in=list(batch.keys()))\
+                        .only(*SEEN_ONLY_FIELDS).as_pymongo():
+        labels_list = batch.get(raw['hostname'])
+        if labels_list and len(labels_list) == 1 and is_seen_only(raw, labels_list[0], config):
+            seen_ids.append(raw['_id'])
+            del batch[raw['hostname']]
+    return seen_ids
+
+
+def _prefetch(hostnames):
+    """
+    Load existing Hosts with one query.
+    Returns dict of Hostname with Host Object and raw Document.
+    """
+    existing = {}
+    for raw in Host.objects(hostname__in=hostnames).as_pymongo():
+        existing[raw['hostname']] = (Host._from_son(copy.deepcopy(raw)), raw)
+    return existing
+
+
+def _write_batch(batch, account_func, update_func, stats, seen_config=None,
+                 account_first=False):
+    """
+    Apply the changes of one Batch in memory and write them with one bulk write.
+    Hosts which are only seen again are updated together with one update_many.
+    """
+    # pylint: disable=too-many-locals, too-many-branches
+    seen_ids = []
+    if seen_config:
+        seen_ids = _find_seen_only(batch, seen_config)
+    existing = _prefetch(list(batch.keys()))
+    operations = []
+    kinds = []
+    invalidated = []
+    for hostname, labels_list in batch.items():
+        host_obj, raw = existing.get(hostname, (None, None))
+        if not host_obj:
+            host_obj = Host()
+            host_obj.hostname = hostname
+        try:
+            do_save = True
+            for labels in labels_list:
+                if account_first:
+                    do_save = account_func(host_obj)
+                    update_func(host_obj, labels)
+                else:
+                    update_func(host_obj, labels)
+                    do_save = account_func(host_obj)
+            if not do_save:
+                print(f" {CC.WARNING} * {CC.ENDC} {hostname}: Managed by diffrent master")
+                stats['skipped'] += 1
+                continue
+            host_obj.validate()
+        except Exception as error: # pylint: disable=broad-except
+            # Like before, a broken Object must not stop the whole Import
+            print(f" {CC.FAIL} * {CC.ENDC} {hostname}: Error: {error}")
+            stats['failed'] += 1
+            continue
+
+        if raw is None:
+            operations.append(InsertOne(host_obj.to_mongo().to_dict()))
+            kinds.append('created')
+            print(f" {CC.OKGREEN} * {CC.ENDC} {hostname}: Created")
+            continue
+
+        if host_obj._cache is not None and host_obj._cache.invalidated:
+            invalidated.append(raw['_id'])
+        update = host_obj.get_update(raw)
+        to_set = update.get('$set', {})
+        changes = [x for x in to_set if x not in SEEN_FIELDS] \
+                    + list(update.get('$unset', {})) + list(update.get('$push', {}))
+        if not changes:
+            if to_set:
+                seen_ids.append(raw['_id'])
+            else:
+                stats['unchanged'] += 1
+            continue
+        operations.append(UpdateOne({'_id': raw['_id']}, update))
+        if [x for x in changes if x != 'labels_hash']:
+            kinds.append('updated')
+            print(f" {CC.OKBLUE} * {CC.ENDC} {hostname}: Updated")
+        else:
+            kinds.append('unchanged')
+
+    if invalidated:
+        HostCache.objects(host_id__in=invalidated, data__fingerprint__exists=False).delete()
+    if seen_ids:
+        stats['unchanged'] += len(seen_ids)
+        Host.objects(id__in=seen_ids).update(set__last_import_seen=datetime.datetime.now())
+
+    if not operations:
+        return
+    for kind in kinds:
+        stats[kind] += 1
+    try:
+        Host._get_collection().bulk_write(operations, ordered=False)
+    except BulkWriteError as error:
+        for write_error in error.details.get('writeErrors', []):
+            kind = kinds[write_error['index']]
+            stats[kind] -= 1
+            stats['failed'] += 1
+            print(f" {CC.FAIL} * {CC.ENDC} Write Error: {write_error.get('errmsg')}")
+
+
+def run_import(config, objects, update_func=None, account_func=None, batch_size=None,
+               account_first=False, seen_config=None):
+    """
+    Import Hosts in Batches.
+    Objects needs to be a iterable of tuples
+    (hostname, labels).
+
+    Existing Hosts of a Batch are loaded with one query,
+    update_func (default: update_host) and account_func
+    (default: set_account with the config) are applied in memory,
+    and all changes are written with one unordered bulk write.
+    account_func runs after update_func, or before it with account_first.
+    Unchanged Hosts are found by their Labels Hash with the default functions,
+    a custom account_func can pass the Account it sets as seen_config.
+
+    Returns dict with the number of created, updated, unchanged,
+    skipped and failed Hosts.
+    """
+    # Unchanged Hosts can only be found with the default update_func,
+    # a custom account_func has to name the Account it sets
+    if update_func:
+        seen_config = None
+    elif not account_func:
+        seen_config = config
+    if not update_func:
+        update_func = default_update
+    if not account_func:
+        account_func = lambda host_obj: host_obj.set_account(account_dict=config)
+    if not batch_size:
+        batch_size = app.config['IMPORT_BATCH_SIZE']
+
+    stats = {
+        'created': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'skipped': 0,
+        'failed': 0,
+    }
+    batch = {}
+    for hostname, labels in objects:
+        if not hostname:
+            continue
+        if app.config['LOWERCASE_HOSTNAMES']:
+            hostname = hostname.lower()
+        # Same Host multiple times in a Batch: apply all, in order
+        batch.setdefault(hostname, []).append(labels)
+        if len(batch) >= batch_size:
+            _write_batch(batch, account_func, update_func, stats, seen_config, account_first)
+            batch = {}
+    if batch:
+        _write_batch(batch, account_func, update_func, stats, seen_config, account_first)
+
+    print(f"{CC.OKCYAN}Import done: {CC.ENDC}" +
+          ", ".join(f"{name}: {count}" for name, count in stats.items()))
+    return stats
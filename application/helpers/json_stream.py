@@ -0,0 +1,115 @@
+"""
+Helper to parse big JSON Documents while they are downloaded
+"""
+import json
+import codecs
+
+# Characters which can follow a complete Value
+DELIMITERS = ' \t\r\n,]}:'
+
+
+class JsonStreamReader():
+    """
+    Parses JSON from Chunks of Text or Bytes,
+    only the not yet parsed Part is kept in Memory
+    """
+
+    def __init__(self, chunks):
+        """
+        Init
+        """
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """
+        Read the next Chunk, returns False at the End
+        """
+        if self.eof:
+            return False
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.eof = True
+            chunk = self.text_decoder.decode(b'', final=True)
+        else:
+            if isinstance(chunk, bytes):
+                chunk = self.text_decoder.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Next Character which is no Whitespace, None at the End
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char):
+        """
+        Skip the given Character
+        """
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected {char} at {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """
+        Parse the next complete Value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A Value at the End of the Buffer may be cut, like a Number.
+                # A cut Number may also end before a . or e of the next Chunk,
+                # so it only counts if a Delimiter follows
+                if self.eof or (end < len(self.buffer)
+                                and self.buffer[end] in DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def iter_array(self, key):
+        """
+        Yield the Items of the Array under key of the top level Object one by one.
+        All other Values of the Object are skipped.
+        """
+        self.expect('{')
+        while self.peek() not in ('}', None):
+            name = self.decode()
+            self.expect(':')
+            if name != key:
+                self.decode()
+            else:
+                self.expect('[')
+                while self.peek() != ']':
+                    yield self.decode()
+                    if self.peek() == ',':
+                        self.pos += 1
+                self.expect(']')
+            if self.peek() == ',':
+                self.pos += 1
+        self.expect('}')
+
+
+def iter_json_array(chunks, key):
+    """
+    Yield the Items of the Array under key in a JSON Object,
+    which is given as Chunks of Text or Bytes.
+    Only one Item needs to be in Memory at the same time.
+    """
+    yield from JsonStreamReader(chunks).iter_array(key)
@@ -3,11 +3,15 @@ Syncers Jinja Functions
 """
 #pylint: disable=logging-fstring-interpolation
 import ast
+import re
 import ipaddress
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from threading import Lock
 import jinja2
-from jinja2 import StrictUndefined
+from jinja2 import StrictUndefined, meta
 
-from application import logger
+from application import logger, app
 from application.modules.checkmk.helpers import cmk_cleanup_tag_id, cmk_cleanup_hostname
 
 
@@ -82,6 +86,137 @@ def merge_list_of_dicts(input_list):
     return dict_obj
 
 
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class TemplateCache():
+    """
+    Size bounded LRU of compiled Templates,
+    keyed by Template String and Mode
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def maxsize():
+        """
+        Configured Size of the Cache
+        """
+        return app.config['JINJA_TEMPLATE_CACHE_SIZE']
+
+    def get(self, value, mode):
+        """
+        Return compiled Template, compile it if not yet cached
+        """
+        key = (value, mode)
+        with self.lock:
+            template = self.templates.get(key)
+            if template is not None:
+                self.templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+        template = get_environment(mode).from_string(value)
+        with self.lock:
+            self.templates[key] = template
+            while len(self.templates) > self.maxsize():
+                self.templates.popitem(last=False)
+        return template
+
+    def info(self):
+        """
+        Hit and Miss counters of the Cache
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize(), len(self.templates))
+
+    def reset_counters(self):
+        """
+        Start counting Hits and Misses again, the Templates stay
+        """
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self):
+        """
+        Empty Cache and reset the counters
+        """
+        with self.lock:
+            self.templates.clear()
+        self.reset_counters()
+
+
+template_cache = TemplateCache()
+_environments = {}
+
+SIMPLE_VARIABLE = re.compile(r'^{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}$')
+
+def get_environment(mode):
+    """
+    Shared Jinja Environment with all Syncer Functions,
+    one per mode
+    """
+    if mode not in _environments:
+        payload = {}
+        if mode in ["raise", "nullify"]:
+            payload['undefined'] = StrictUndefined
+        env = jinja2.Environment(**payload)
+        env.globals.update({
+            'get_list': get_list,
+            'merge_list_of_dicts': merge_list_of_dicts,
+            'cmk_cleanup_tag_id': cmk_cleanup_tag_id,
+            'cmk_cleanup_hostname': cmk_cleanup_hostname,
+            'get_ip_network': get_ip_network,
+            'get_ip4_interface': get_ip_interface,
+            'get_ip_interface': get_ip_interface,
+            'eval': syncer_eval,
+            'defined': syncer_defined,
+        })
+        _environments[mode] = env
+    return _environments[mode]
+
+def _is_plain_string(value):
+    """
+    Check if Jinja would return the string unchanged
+    """
+    if '{{' in value or '{%' in value or '{#' in value:
+        return False
+    # Jinja normalizes newlines and strips a trailing one
+    return '\r' not in value and not value.endswith('\n')
+
+@lru_cache(maxsize=4096)
+def template_variables(value):
+    """
+    Names of the Variables a Template reads,
+    None if the Template can't be parsed
+    """
+    value = str(value).replace('\n', '')
+    if _is_plain_string(value):
+        return frozenset()
+    try:
+        return frozenset(meta.find_undeclared_variables(get_environment('raise').parse(value)))
+    except jinja2.exceptions.TemplateSyntaxError:
+        return None
+
+@lru_cache(maxsize=4096)
+def _simple_variable(value):
+    """
+    Name of the Variable if the Template only prints it, else None.
+    Literals like true or none and the Globals are no Variables.
+    """
+    if not (simple := SIMPLE_VARIABLE.match(value)):
+        return None
+    name = simple.group(1)
+    if template_variables(value) != {name} or name in get_environment('raise').globals:
+        return None
+    return name
+
 def render_jinja(value, mode="ignore", replace_newlines=True, **kwargs):
     """
     Render given string
@@ -91,33 +226,18 @@ def render_jinja(value, mode="ignore", replace_newlines=True, **kwargs):
     - raise: Raise Error if missing Variables
     - nullify: Nullify string in nase of missing Variables
     """
-    #logger.debug(f"JINJA: Rewrite String: {value}")
-    payload = {}
-
     if replace_newlines:
         value = value.replace('\n','')
-        #logger.debug(f"JINJA: Replaced Newlines: {value}")
-
-    if mode in ["raise", "nullify"]:
-        #value_tpl.undefined = StrictUndefined
-        payload['undefined'] = StrictUndefined
-        #logger.debug("JINJA: Strict Undefined defined")
-
-
-    value_tpl = jinja2.Template(str(value), **payload)
-    value_tpl.globals.update({
-        'get_list': get_list,
-        'merge_list_of_dicts': merge_list_of_dicts,
-        'cmk_cleanup_tag_id': cmk_cleanup_tag_id,
-        'cmk_cleanup_hostname': cmk_cleanup_hostname,
-        'get_ip_network': get_ip_network,
-        'get_ip4_interface': get_ip_interface,
-        'get_ip_interface': get_ip_interface,
-        'eval': syncer_eval,
-        'defined': syncer_defined,
+    value = str(value)
 
-    })
+    # Fast Paths, no need for Jinja
+    if _is_plain_string(value):
+        return value
+    # Missing Variables are handled by Jinja, depending on the mode
+    if (name := _simple_variable(value)) and name in kwargs:
+        return str(kwargs[name])
 
+    value_tpl = template_cache.get(value, mode)
 
     if mode == 'nullify':
         try:
@@ -130,5 +250,4 @@ def render_jinja(value, mode="ignore", replace_newlines=True, **kwargs):
             return ""
     else:
         final = value_tpl.render(**kwargs)
-    #logger.debug(f"JINJA: String After Rewrite: {final}")
     return final
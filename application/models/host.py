@@ -4,8 +4,12 @@ Host Model
 # pylint: disable=no-member, too-few-public-methods, too-many-instance-attributes
 # pylint: disable=logging-fstring-interpolation
 import re
+import json
+import hashlib
 import datetime
+from collections.abc import MutableMapping
 from mongoengine.errors import DoesNotExist
+from pymongo.errors import PyMongoError
 from application import db, app, logger
 from application.modules.debug import ColorCodes as CC
 from application.helpers.syncer_jinja import render_jinja
@@ -23,6 +27,292 @@ class Target(db.EmbeddedDocument):
     target_account_name = db.StringField()
     last_update = db.DateTimeField()
 
+def _get_path(raw, path):
+    """
+    Value of a dotted path in a raw Document,
+    raises KeyError if not found
+    """
+    value = raw
+    for part in path.split('.'):
+        if isinstance(value, list):
+            value = value[int(part)]
+        else:
+            value = value[part]
+    return value
+
+
+class HostCache(db.Document):
+    """
+    Cache Entry of a Host, like Rule Outcomes or Attributes
+    """
+    host_id = db.ObjectIdField(required=True)
+    name = db.StringField(required=True)
+    version = db.StringField()
+    data = db.DictField()
+    last_update = db.DateTimeField()
+
+    meta = {
+        'strict': False,
+        'indexes': [
+            {'fields': ['host_id', 'name'], 'unique': True},
+            'version',
+        ],
+    }
+
+
+class HostCacheEntries(MutableMapping):
+    """
+    Cache of a Host, stored in the HostCache Collection.
+    Entries are loaded on first access, changed ones are
+    written with targeted upserts when the Host is saved.
+    """
+
+    def __init__(self, host_id=None, entries=None):
+        """
+        Init
+        """
+        self.host_id = host_id
+        self.entries = entries
+        self.changed = set()
+        self.deleted = set()
+        self.cleared = False
+        self.invalidated = False
+
+    def _load(self):
+        """
+        Load Entries of the Host
+        """
+        if self.entries is None:
+            self.entries = {}
+            if self.host_id:
+                for entry in HostCache.objects(host_id=self.host_id).as_pymongo():
+                    value = entry.get('data', {})
+                    if self.invalidated and 'fingerprint' not in value:
+                        # Invalidated before the first access,
+                        # the Database still has the stale Entry
+                        continue
+                    self.entries[entry['name']] = value
+        return self.entries
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.changed.add(key)
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.changed.discard(key)
+        self.deleted.add(key)
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def setdefault(self, key, default=None):
+        """
+        Mark as changed, since the Entry may be changed in place
+        """
+        if key not in self:
+            self[key] = default
+        self.changed.add(key)
+        return self[key]
+
+    def clear(self):
+        """
+        Delete all Entries
+        """
+        self.entries = {}
+        self.changed = set()
+        self.deleted = set()
+        self.cleared = True
+
+    def invalidate(self):
+        """
+        Delete all Entries which are not checked on use
+        by their fingerprint. Works without loading them.
+        """
+        if self.entries is None:
+            self.invalidated = True
+            return
+        for key, value in list(self.entries.items()):
+            if not isinstance(value, dict) or 'fingerprint' not in value:
+                del self[key]
+
+    def flush(self, host_id):
+        """
+        Write the changes
+        """
+        self.host_id = host_id
+        if self.cleared:
+            HostCache.objects(host_id=host_id).delete()
+        elif self.invalidated:
+            HostCache.objects(host_id=host_id, data__fingerprint__exists=False).delete()
+        if self.deleted:
+            HostCache.objects(host_id=host_id, name__in=list(self.deleted)).delete()
+        now = datetime.datetime.now()
+        for key in self.changed:
+            value = self.entries[key]
+            version = value.get('rules_version') if isinstance(value, dict) else None
+            HostCache.objects(host_id=host_id, name=key).update_one(upsert=True,
+                                                                    set__data=value,
+                                                                    set__version=version,
+                                                                    set__last_update=now)
+        self.changed = set()
+        self.deleted = set()
+        self.cleared = False
+        self.invalidated = False
+
+    def get_changes(self):
+        """
+        Changes which are not written yet, as plain dict
+        which can be sent to an other process. None if nothing changed.
+        """
+        if not (self.changed or self.deleted or self.cleared or self.invalidated):
+            return None
+        return {
+            'changed': {key: self.entries[key] for key in self.changed},
+            'deleted': list(self.deleted),
+            'cleared': self.cleared,
+            'invalidated': self.invalidated,
+        }
+
+    @classmethod
+    def from_changes(cls, host_id, changes):
+        """
+        Entries with the Changes of get_changes(), ready to flush
+        """
+        entries = cls(host_id, dict(changes['changed']))
+        entries.changed = set(changes['changed'])
+        entries.deleted = set(changes['deleted'])
+        entries.cleared = changes['cleared']
+        entries.invalidated = changes['invalidated']
+        return entries
+
+
+# Fields the Exports need, everything else stays in the Database
+EXPORT_FIELDS = ['hostname', 'labels', 'inventory', 'source_account_name',
+                 'folder', 'sync_id', 'is_object', 'object_type', 'available']
+
+
+class HostView():
+    """
+    Read-only Host for Exports, built from the raw Document.
+    Has everything the Rules need, only changes of the Cache are saved.
+    """
+    __slots__ = ('id', 'hostname', 'labels', 'inventory', 'source_account_name',
+                 'folder', 'sync_id', 'is_object', 'object_type', 'available', '_cache')
+
+    def __init__(self, raw):
+        """
+        Init
+        """
+        self.id = raw['_id'] # pylint: disable=invalid-name
+        self.hostname = raw['hostname']
+        self.labels = raw.get('labels', {})
+        self.inventory = raw.get('inventory', {})
+        self.source_account_name = raw.get('source_account_name')
+        self.folder = raw.get('folder')
+        self.sync_id = raw.get('sync_id')
+        self.is_object = raw.get('is_object', False)
+        self.object_type = raw.get('object_type')
+        self.available = raw.get('available')
+        self._cache = None
+
+    @property
+    def cache(self):
+        """
+        Cache of the Host, see HostCacheEntries
+        """
+        if self._cache is None:
+            self._cache = HostCacheEntries(self.id)
+        return self._cache
+
+    def get_labels(self):
+        """ Return Hosts Labels dict. """
+        return self.labels
+
+    def get_inventory(self, key_filter=False):
+        """ Return all Inventory Data of Host. """
+        if key_filter:
+            return {key: value for key, value in self.inventory.items() \
+                            if key.startswith(key_filter)}
+        return self.inventory
+
+    def get_folder(self):
+        """ Returns Folder if System is locked to one, else False """
+        return self.folder or False
+
+    def save(self):
+        """
+        Save the changes of the Cache
+        """
+        if self._cache is not None:
+            self._cache.flush(self.id)
+
+
+class HostSnapshot(HostView):
+    """
+    Host for Worker Processes, built from the raw Document and cheap to pickle.
+    save() writes nothing, the changes are collected with get_write_back(),
+    and the Worker writes them with apply_write_back() once the Host is calculated.
+    """
+    __slots__ = ('folder_changed',)
+
+    def __init__(self, raw):
+        """
+        Init
+        """
+        super().__init__(raw)
+        self.folder_changed = False
+
+    def lock_to_folder(self, folder_name):
+        """
+        Lock System to given Folder
+        Or remove it folder is False
+        """
+        self.folder = folder_name or None
+        self.folder_changed = True
+
+    def save(self):
+        """
+        Changes are kept for the Write-Back
+        """
+
+    def get_write_back(self):
+        """
+        Changes of the Cache and the Folder, None if nothing changed
+        """
+        write_back = {}
+        if self._cache is not None:
+            changes = self._cache.get_changes()
+            if changes:
+                write_back['cache'] = changes
+        if self.folder_changed:
+            write_back['folder'] = self.folder
+        return write_back or None
+
+    @staticmethod
+    def apply_write_back(host_id, write_back):
+        """
+        Write the Changes made on the Snapshot of the Host.
+        Called in the Worker Process, the Main Process writes nothing.
+        """
+        if not write_back:
+            return
+        if 'cache' in write_back:
+            HostCacheEntries.from_changes(host_id, write_back['cache']).flush(host_id)
+        if 'folder' in write_back:
+            if write_back['folder']:
+                Host.objects(id=host_id).update_one(set__folder=write_back['folder'])
+            else:
+                Host.objects(id=host_id).update_one(unset__folder=True)
+
+
 class Host(db.Document):
     """
     Host
@@ -30,6 +320,7 @@ class Host(db.Document):
     hostname = db.StringField(required=True, unique=True)
     sync_id = db.StringField()
     labels = db.DictField()
+    labels_hash = db.StringField()
     inventory = db.DictField()
 
     is_object = db.BooleanField(default=False)
@@ -55,13 +346,226 @@ class Host(db.Document):
 
     log = db.ListField(field=db.StringField())
 
-    cache = db.DictField()
+    _cache = None
+    _new_log_entries = None
 
 
     meta = {
         'strict': False,
+        'indexes': [
+            # Exports, Host and Object counts
+            ('available', 'is_object'),
+            ('is_object', 'last_import_seen'),
+            # objects_by_filter
+            'object_type',
+            # Maintenance per Account and Cisco DNA
+            ('source_account_id', 'last_import_seen'),
+            # Maintenance
+            'last_import_seen',
+        ],
     }
 
+    @classmethod
+    def ensure_indexes(cls):
+        """
+        Create also the Wildcard Indexes for the Label and Inventory Key Filters.
+        They can't be declared in meta, and need at least MongoDB 4.2
+        """
+        super().ensure_indexes()
+        collection = cls._get_collection()
+        for field in ['labels', 'inventory']:
+            try:
+                collection.create_index([(f'{field}.$**', 1)], name=f'{field}_wildcard')
+            except (PyMongoError, NotImplementedError) as error:
+                logger.debug(f"No Wildcard Index for {field}: {error}")
+
+    @property
+    def cache(self):
+        """
+        Cache of the Host, see HostCacheEntries
+        """
+        if self._cache is None:
+            self._cache = HostCacheEntries(self.id)
+        return self._cache
+
+    @cache.setter
+    def cache(self, entries):
+        """
+        Replace all Entries of the Cache
+        """
+        self.cache.clear()
+        for key, value in entries.items():
+            self.cache[key] = value
+
+    @staticmethod
+    def prefetch_cache(db_hosts, names=None):
+        """
+        Load the Cache of many Hosts with one query,
+        only the Entries with the given names if set
+        """
+        by_id = {}
+        for db_host in db_hosts:
+            if db_host.id and db_host._cache is None:
+                by_id[db_host.id] = {}
+                db_host._cache = HostCacheEntries(db_host.id, by_id[db_host.id])
+        if not by_id:
+            return
+        query = HostCache.objects(host_id__in=list(by_id.keys()))
+        if names is not None:
+            query = query.filter(name__in=list(names))
+        for entry in query.as_pymongo():
+            by_id[entry['host_id']][entry['name']] = entry.get('data', {})
+
+    @staticmethod
+    def iter_with_cache(db_hosts, batch_size=None, cache_names=None):
+        """
+        Iterate Hosts, the Cache is loaded for batch_size Hosts at once
+        """
+        if not batch_size:
+            batch_size = app.config['RULE_BATCH_SIZE']
+        batch = []
+        for db_host in db_hosts:
+            batch.append(db_host)
+            if len(batch) >= batch_size:
+                Host.prefetch_cache(batch, cache_names)
+                yield from batch
+                batch = []
+        Host.prefetch_cache(batch, cache_names)
+        yield from batch
+
+    @staticmethod
+    def iter_hosts(query=None, fields=None, batch_size=None, views=False, cache_names=None):
+        """
+        Iterate Hosts for Exports.
+        Only the given fields (default: EXPORT_FIELDS) are loaded,
+        batch_size Hosts are fetched per round trip, together with their Cache.
+
+        Args:
+            query (QuerySet): Hosts to iterate, default all
+            fields (list): Fields to load, the hostname and labels are always loaded
+            batch_size (int): Default HOST_ITER_BATCH_SIZE
+            views (bool|class): Return read-only HostViews instead of Documents,
+                                or Objects of the given HostView class
+            cache_names (list): Load only these Cache Entries, default all
+        """
+        if query is None:
+            query = Host.objects()
+        fields = list(set((fields or EXPORT_FIELDS) + ['hostname', 'labels']))
+        if not batch_size:
+            batch_size = app.config['HOST_ITER_BATCH_SIZE']
+        query = query.only(*fields).batch_size(batch_size)
+        if views:
+            view_class = views if isinstance(views, type) else HostView
+            query = (view_class(raw) for raw in query.as_pymongo())
+        yield from Host.iter_with_cache(query, batch_size, cache_names)
+
+    def get_update(self, raw=None):
+        """
+        Update Document with only the changed Fields:
+        $set and $unset for them, and $push with $slice for new Log Entries.
+        If the raw Document is given, Fields which are marked as changed
+        but still have the same value are left out.
+        """
+        to_set, to_unset = self._delta()
+        push = None
+        if self._new_log_entries:
+            to_set = {key: value for key, value in to_set.items() \
+                        if key != 'log' and not key.startswith('log.')}
+            push = {
+                'log': {
+                    '$each': self._new_log_entries,
+                    '$position': 0,
+                    '$slice': app.config['HOST_LOG_LENGTH'],
+                }
+            }
+        if raw is not None:
+            for path, value in list(to_set.items()):
+                try:
+                    if _get_path(raw, path) == value:
+                        del to_set[path]
+                except (KeyError, IndexError, ValueError, TypeError):
+                    pass
+            for path in list(to_unset):
+                try:
+                    _get_path(raw, path)
+                except (KeyError, IndexError, ValueError, TypeError):
+                    del to_unset[path]
+        update = {}
+        if to_set:
+            update['$set'] = to_set
+        if to_unset:
+            update['$unset'] = to_unset
+        if push:
+            update['$push'] = push
+        return update
+
+    def save(self, *args, **kwargs):
+        """
+        Save the Host, and the changes of its Cache.
+        Existing Hosts are only updated in the changed Fields,
+        so that parallel Imports and Exports don't overwrite each other.
+        """
+        if self._created or not self.id:
+            result = super().save(*args, **kwargs)
+        else:
+            if kwargs.get('validate', True):
+                self.validate(clean=kwargs.get('clean', True))
+            if update := self.get_update():
+                self._get_collection().update_one({'_id': self.id}, update)
+            self._clear_changed_fields()
+            result = self
+        self._new_log_entries = None
+        if self._cache is not None:
+            self._cache.flush(self.id)
+        return result
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete the Host and its Cache
+        """
+        HostCache.objects(host_id=self.id).delete()
+        return super().delete(*args, **kwargs)
+
+    def __getstate__(self):
+        """
+        Keep the Cache when send to other Processes
+        """
+        state = super().__getstate__()
+        state['_cache'] = self._cache
+        return state
+
+    def __setstate__(self, state):
+        cache = state.pop('_cache', None)
+        super().__setstate__(state)
+        self._cache = cache
+
+    def clean(self):
+        """
+        Keep the Hash of the Labels up to date on every save
+        """
+        self.labels_hash = self.hash_labels(self.labels)
+
+    @staticmethod
+    def hash_labels(labels):
+        """
+        Hash of Labels, used to find unchanged Hosts on Import
+        """
+        return hashlib.sha1(json.dumps(labels, sort_keys=True, default=str)\
+                                .encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def normalize_labels(labels):
+        """
+        Labels like update_host would store them
+        """
+        if app.config['LABELS_ITERATE_FIRST_LEVEL']:
+            labels = dict(labels)
+            for key, value in list(labels.items()):
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        labels[f'{key}__{sub_key}'] = sub_value
+                    del labels[key]
+        return {Host._fix_key(key): value for key, value in labels.items()}
 
     def is_valid_hostname(self):
         """
@@ -157,7 +661,7 @@ class Host(db.Document):
             if current_value == value:
                 return
         self.labels[key] = value
-        self.cache = {}
+        self.invalidate_cache()
 
     def update_host(self, labels):
         """
@@ -176,7 +680,8 @@ class Host(db.Document):
             self.set_labels(labels)
         self.set_import_seen()
 
-    def _fix_key(self, key):
+    @staticmethod
+    def _fix_key(key):
         key = str(key)
         if app.config['LOWERCASE_ATTRIBUTE_KEYS']:
             key = key.lower()
@@ -197,7 +702,15 @@ class Host(db.Document):
         new_labels = dict(map(lambda kv: (self._fix_key(kv[0]), kv[1]), label_dict.items()))
         self.add_log(f"Label Change: {self.labels} to {new_labels}")
         self.labels = new_labels
-        self.cache = {}
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """
+        Delete the Cache after Attribute changes.
+        Rule Outcomes carry a fingerprint of the Attributes they depend on,
+        they are checked on use and can stay.
+        """
+        self.cache.invalidate()
 
     def get_labels(self):
         """
@@ -213,10 +726,10 @@ class Host(db.Document):
         if key in self.inventory:
             if self.inventory[key] != value:
                 self.inventory[key] = value
-                self.cache = {}
+                self.invalidate_cache()
         else:
             self.inventory[key] = value
-            self.cache = {}
+            self.invalidate_cache()
         self.save()
 
 
@@ -282,7 +795,7 @@ class Host(db.Document):
         # is not longer valid
         if check_dict != update_dict:
             self.add_log(f"Inventory Change: {check_dict} to {update_dict}")
-            self.cache = {}
+            self.invalidate_cache()
 
     def get_inventory(self, key_filter=False):
         """
@@ -309,6 +822,8 @@ class Host(db.Document):
         entries = self.log[:app.config['HOST_LOG_LENGTH']-1]
         date = datetime.datetime.now().strftime(app.config['TIME_STAMP_FORMAT'])
         self.log = [f"{date} {entry}"] + entries
+        # Saved with $push, newest first
+        self._new_log_entries = self.log[:len(self._new_log_entries or []) + 1]
 
     def set_account(self, account_id=False, account_name=False, account_dict=False):
         """
@@ -377,7 +892,7 @@ class Host(db.Document):
         self.available = True
         self.last_import_sync = datetime.datetime.now()
         # Delete Cache if new Data is imported
-        self.cache = {}
+        self.invalidate_cache()
 
     def set_import_seen(self):
         """
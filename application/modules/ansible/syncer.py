@@ -43,11 +43,17 @@ class SyncAnsible(Plugin):
         Return extra Attributes based on
         rules which has existing attributes in condition
         """
-        if db_host.cache.get('ansible',{}).get('outcomes'):
-            return db_host.cache['ansible']['outcomes']
+        # Rule or Attribute changes give a new fingerprint
+        fingerprint = self.actions.get_fingerprint(db_host, attributes)
+        entry = db_host.cache.get('ansible', {})
+        if fingerprint and entry.get('fingerprint') == fingerprint \
+                and entry.get('outcomes'):
+            return entry['outcomes']
         outcomes = self.actions.get_outcomes(db_host, attributes)
-        db_host.cache.setdefault('ansible', {})
-        db_host.cache['ansible']['outcomes'] = outcomes
+        db_host.cache['ansible'] = {
+            'fingerprint': fingerprint,
+            'outcomes': outcomes,
+        }
         db_host.save()
         return outcomes
 
@@ -65,7 +71,7 @@ class SyncAnsible(Plugin):
             },
         }
         #pylint: disable=no-member
-        for db_host in Host.objects():
+        for db_host in Host.iter_hosts(views=True):
             hostname = db_host.hostname
 
             attributes = self.get_host_attributes(db_host, 'ansible')
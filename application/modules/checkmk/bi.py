@@ -29,7 +29,7 @@ class BI(CMK2):
 
         unique_rules = {}
         related_packs = []
-        for db_host in Host.objects():
+        for db_host in Host.iter_hosts(views=True):
             attributes = self.get_host_attributes(db_host, 'cmk_conf')
             if not attributes:
                 continue
@@ -100,7 +100,7 @@ class BI(CMK2):
 
         unique_aggregations = {}
         related_packs = []
-        for db_host in Host.objects():
+        for db_host in Host.iter_hosts(views=True):
             attributes = self.get_host_attributes(db_host, 'cmk_conf')
             if not attributes:
                 continue
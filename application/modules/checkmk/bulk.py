@@ -0,0 +1,55 @@
+"""
+Concurrent Bulk Requests to Checkmk
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class BulkDispatcher():
+    """
+    Sends Requests with a Thread Pool, with at most max_in_flight at once.
+    The on_done callbacks run in the calling Thread,
+    so they can update the Syncer without locks.
+    """
+
+    def __init__(self, max_in_flight):
+        """
+        Init
+        """
+        self.max_in_flight = max(int(max_in_flight), 1)
+        self.executor = None
+        self.pending = []
+
+    def _collect(self, block=False):
+        """
+        Call on_done of the finished Requests.
+        If block is set, wait until at least one finished
+        """
+        if not self.pending:
+            return
+        if block:
+            wait([x[0] for x in self.pending], return_when=FIRST_COMPLETED)
+        for entry in list(self.pending):
+            future, on_done = entry
+            if future.done():
+                self.pending.remove(entry)
+                on_done(future.result())
+
+    def submit(self, func, args, on_done):
+        """
+        Run func(*args) in the Pool, on_done gets its result.
+        Blocks while max_in_flight Requests are running.
+        """
+        if not self.executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self._collect()
+        while len(self.pending) >= self.max_in_flight:
+            self._collect(block=True)
+        self.pending.append((self.executor.submit(func, *args), on_done))
+
+    def wait(self):
+        """
+        Wait until all Requests are done.
+        Everything sent after this can depend on them.
+        """
+        while self.pending:
+            self._collect(block=True)
@@ -26,9 +26,9 @@ class CMK2(Plugin):
     """
 
 
-    def request(self, params, method='GET', data=None, additional_header=None):
+    def get_url_and_headers(self, params, method='GET', additional_header=None):
         """
-        Handle Request to CMK
+        URL and Headers for a Request to CMK
         """
         address = self.config['address']
         username = self.config['username']
@@ -40,13 +40,34 @@ class CMK2(Plugin):
             'Authorization': f'Bearer {username} {password}',
             'Accept': 'application/json',
         }
-        response = False
         if additional_header:
             headers.update(additional_header)
 
         if method.lower() in ['post', 'put', 'delete']:
             headers['Content-Type'] = 'application/json'
+        return url, headers
 
+    def stream_request(self, params):
+        """
+        GET Request to CMK, without loading the Response at once.
+        Returns the Response, to be read with iter_content()
+        """
+        url, headers = self.get_url_and_headers(params)
+        try:
+            response = self.inner_request('GET', url, headers=headers, stream=True)
+        except ConnectionError:
+            #pylint: disable=raise-missing-from
+            raise CmkException("Can't connect to Checkmk")
+        if response.status_code != 200:
+            raise CmkException(f"Request failed with {response.status_code}: {response.text}")
+        return response
+
+    def request(self, params, method='GET', data=None, additional_header=None):
+        """
+        Handle Request to CMK
+        """
+        url, headers = self.get_url_and_headers(params, method, additional_header)
+        response = False
 
         try:
             #pylint: disable=missing-timeout
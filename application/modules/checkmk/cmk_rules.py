@@ -22,7 +22,13 @@ class CheckmkRuleSync(CMK2):
     """
     Export Checkmk Rules
     """
-    rulsets_by_type = {}
+
+    def __init__(self, account=False):
+        """
+        Init
+        """
+        super().__init__(account)
+        self.rulsets_by_type = {}
 
     def export_cmk_rules(self): # pylint: disable=too-many-branches, too-many-statements
         """
@@ -42,7 +48,7 @@ class CheckmkRuleSync(CMK2):
             task1 = progress.add_task("Calculate Ruels", total=total)
             object_filter = self.config['settings'].get(self.name, {}).get('filter')
             db_objects = Host.objects_by_filter(object_filter)
-            for db_host in db_objects:
+            for db_host in Host.iter_hosts(db_objects, views=True):
                 attributes = self.get_host_attributes(db_host, 'cmk_conf')
                 if not attributes:
                     continue
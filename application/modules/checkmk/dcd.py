@@ -15,7 +15,13 @@ class CheckmkDCDRuleSync(CMK2):
     Sync Checkmk Downtimes
     """
     console = None
-    all_rules = []
+
+    def __init__(self, account=False):
+        """
+        Init
+        """
+        super().__init__(account)
+        self.all_rules = []
 
     def does_rule_exist(self, rule_id):
         """
@@ -151,7 +157,7 @@ class CheckmkDCDRuleSync(CMK2):
             task1 = progress.add_task("Calculate Rules", total=total)
             object_filter = self.config['settings'].get(self.name, {}).get('filter')
             db_objects = Host.objects_by_filter(object_filter)
-            for db_host in db_objects:
+            for db_host in Host.iter_hosts(db_objects, views=True):
                 attributes = self.get_host_attributes(db_host, 'cmk_conf')
                 if not attributes:
                     continue
@@ -215,7 +215,7 @@ class CheckmkDowntimeSync(CMK2):
             task1 = progress.add_task("Calculating Downtimes", total=total)
             object_filter = self.config['settings'].get(self.name, {}).get('filter')
             db_objects = Host.objects_by_filter(object_filter)
-            for db_host in db_objects:
+            for db_host in Host.iter_hosts(db_objects, views=True):
                 hostname = db_host.hostname
                 progress.console.print(f"- Started for {hostname}")
                 attributes = self.get_host_attributes(db_host, 'cmk_conf')
@@ -2,6 +2,8 @@
 Checkmk Helpers
 """
 import re
+import json
+import hashlib
 from application import app
 
 def cmk_cleanup_tag_id(input_str):
@@ -32,3 +34,47 @@ def cmk_cleanup_hostname(input_str):
         for needle, replacer in app.config['REPLACERS']:
             input_str = input_str.replace(needle, replacer)
     return re.sub('[^a-zA-Z0-9_-]', '_', input_str.strip()).lower()
+
+
+def export_fingerprint(data):
+    """
+    Hash of the given Export State,
+    independent of the Order of Dict Keys
+    """
+    content = json.dumps(data, sort_keys=True, default=repr)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class CheckmkHost():
+    """
+    The Parts of a Host in Checkmk the Syncer compares,
+    everything else of the API Response is dropped
+    """
+    __slots__ = ('folder', 'attributes', 'is_cluster', 'cluster_nodes')
+
+    def __init__(self, folder, attributes, is_cluster=False, cluster_nodes=None):
+        """
+        Init
+        """
+        self.folder = folder
+        self.attributes = attributes
+        self.is_cluster = is_cluster
+        self.cluster_nodes = cluster_nodes or []
+
+    @classmethod
+    def from_api(cls, host):
+        """
+        Build from a Host Object of the REST API
+        """
+        extensions = host['extensions']
+        attributes = extensions.get('attributes', {})
+        attributes.pop('meta_data', None)
+        return cls(extensions.get('folder', '/'), attributes,
+                   extensions.get('is_cluster', False), extensions.get('cluster_nodes'))
+
+    def fingerprint(self):
+        """
+        Hash of the State in Checkmk
+        """
+        return export_fingerprint([self.folder, self.attributes,
+                                   self.is_cluster, sorted(self.cluster_nodes)])
@@ -27,27 +27,15 @@ class InventorizeHosts(CMK2):
     name = "Checkmk Inventory run"
     source = "cmk_inventorize"
 
-    fields = {}
     account = ""
     config = {}
 
-    found_hosts = []
-
-    status_inventory = {}
-    hw_sw_inventory = {}
-    service_label_inventory = {}
-    config_inventory = {}
-    label_inventory = {}
-
-
-    checkmk_folders = []
-
     def add_host(self, host):
         """
         Just add if not in
         """
-        if host not in self.found_hosts:
-            self.found_hosts.append(host)
+        # Dict as ordered Set
+        self.found_hosts.setdefault(host, None)
 
     def fetch_checkmk_folders(self):
         """
@@ -64,13 +52,24 @@ class InventorizeHosts(CMK2):
             for folder in api_folders[0]['value']:
                 progress.update(task1, advance=1)
                 path = folder['extensions']['path']
-                self.checkmk_folders.append(path)
+                self.checkmk_folders.add(path)
 
     def __init__(self, account):
         """Init"""
 
         super().__init__(account)
 
+        self.fields = {}
+        self.found_hosts = {}
+
+        self.status_inventory = {}
+        self.hw_sw_inventory = {}
+        self.service_label_inventory = {}
+        self.config_inventory = {}
+        self.label_inventory = {}
+
+        self.checkmk_folders = set()
+
         for rule in CheckmkInventorizeAttributes.objects():
             self.fields.setdefault(rule.attribute_source, [])
             field_list = [x.strip() for x in rule.attribute_names.split(',')]
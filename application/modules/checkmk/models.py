@@ -683,3 +683,26 @@ class CheckmkObjectCache(db.Document):
     }
 
 #.
+#   .-- Export Fingerprint
+
+class CheckmkExportFingerprint(db.Document):
+    """
+    State of a Host in a Checkmk Account after the last Export.
+    target is the hash of what the Syncer wants to have,
+    checkmk the hash of what Checkmk had when it matched.
+    """
+    account = db.StringField(required=True)
+    hostname = db.StringField(required=True)
+    target = db.StringField()
+    checkmk = db.StringField()
+
+    last_update = db.DateTimeField()
+
+    meta = {
+        'strict': False,
+        'indexes': [
+            {'fields': ['account', 'hostname'], 'unique': True},
+        ],
+    }
+
+#.
@@ -13,11 +13,17 @@ class CheckmkPasswordSync(CMK2):
     Sync Checkmk Passwords
     """
     console = None
-    current_password_ids = []
 
     name = "Sync Passwords to Checkmk"
     source = "cmk_password_sync"
 
+    def __init__(self, account=False):
+        """
+        Init
+        """
+        super().__init__(account)
+        self.current_password_ids = set()
+
     def get_current_passwords(self):
         """
         Check if Rule is existing
@@ -25,7 +31,7 @@ class CheckmkPasswordSync(CMK2):
         url = "/domain-types/password/collections/all"
         response = self.request(url, method="GET")[0]
         for entry in response['value']:
-            self.current_password_ids.append(entry['id'])
+            self.current_password_ids.add(entry['id'])
 
 
     def build_payload(self, password):
@@ -9,6 +9,7 @@ from application import app
 from application.helpers.syncer_jinja import render_jinja
 from application import logger
 from application.modules.rule.rule import Rule
+from application.modules.rule.compiler import RuleDependencies
 from application.modules.debug import debug as print_debug
 from application.modules.debug import ColorCodes
 from application.modules.checkmk import poolfolder
@@ -301,6 +302,38 @@ class CheckmkRule(Rule): # pylint: disable=too-few-public-methods
         print_debug(self.debug, "")
         return outcomes
 
+    def outcome_dependencies(self, outcome):
+        """
+        Attributes read by the Outcome
+        """
+        dependencies = RuleDependencies()
+        action = outcome['action']
+        action_param = outcome.get('action_param') or ''
+        if action in ['value_as_folder', 'tag_as_folder']:
+            dependencies.all_names = True
+        elif action == 'create_cluster':
+            for node_tag in [x.strip() for x in action_param.split(',')]:
+                if node_tag.endswith('*'):
+                    dependencies.prefixes.add(node_tag[:-1])
+                else:
+                    dependencies.names.add(node_tag)
+        elif action in ['move_folder', 'create_folder', 'remove_attr_if_not_set',
+                        'custom_attribute', 'set_parent']:
+            dependencies.add_templates([action_param])
+        return dependencies
+
+    def can_share_outcomes(self, db_host):
+        """
+        Pool Folders are assigned per Host,
+        so they can't be shared with other Hosts
+        """
+        if db_host.get_folder():
+            return False
+        for rule in self.compile_rules():
+            if any(x['action'] == 'folder_pool' for x in rule.outcomes):
+                return False
+        return super().can_share_outcomes(db_host)
+
     def check_rule_match(self, db_host):
         """
         Overwritten cause of folder_pool
@@ -6,34 +6,87 @@ Add Hosts into CMK Version 2 Installations
 #pylint: disable=too-many-branches, too-many-instance-attributes, too-many-public-methods
 #pylint: disable=too-many-lines
 import ast
+import time
+import datetime
 import multiprocessing
+from functools import partial
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from pymongo import UpdateOne
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn, MofNCompleteColumn
-from application import app, logger, log
-from application.models.host import Host
+from application import app, logger, log, create_pool
+from application.models.host import Host, HostSnapshot
 from application.modules.checkmk.cmk2 import CMK2, CmkException
+from application.modules.checkmk.bulk import BulkDispatcher
+from application.modules.checkmk.helpers import CheckmkHost, export_fingerprint
+from application.modules.checkmk.models import CheckmkExportFingerprint
+from application.modules.rule.compiler import stats_collector
+from application.modules.rule.profiling import rule_profiler
+from application.helpers.json_stream import iter_json_array
 from application.modules.debug import ColorCodes as CC
 
+# Syncer of a Worker Process, set once by init_worker
+_WORKER_SYNCER = None
 
-class SyncCMK2(CMK2):
+
+def init_worker(syncer):
     """
-    Sync Functions
+    Initialize a Worker Process with the Syncer and its compiled Rules,
+    so they are not sent again with every Chunk
     """
-    #log_details = []
+    global _WORKER_SYNCER # pylint: disable=global-statement
+    _WORKER_SYNCER = syncer
 
-    bulk_creates = []
-    bulk_updates = []
 
-    disabled_hosts = []
-
-    synced_hosts = []
+def calculate_chunk(host_ids):
+    """
+    Calculation for a Chunk of Hosts in a Worker Process.
+    The Hosts are loaded here, and the Changes of their Cache and Folder
+    are written from here, right after each Host is calculated.
+    Returns a list of tuples (hostname, result, error),
+    the result is None if the Host is disabled or failed.
+    """
+    syncer = _WORKER_SYNCER
+    results = []
+    query = Host.objects(id__in=host_ids)
+    for snapshot in Host.iter_hosts(query, views=HostSnapshot, batch_size=len(host_ids),
+                                    cache_names=syncer.get_cache_names('checkmk')):
+        try:
+            result = syncer.calculate_host(snapshot)
+            HostSnapshot.apply_write_back(snapshot.id, snapshot.get_write_back())
+        except Exception as error: # pylint: disable=broad-except
+            if syncer.debug:
+                raise
+            results.append((snapshot.hostname, None, str(error)))
+            continue
+        results.append((snapshot.hostname, result, None))
+    # The Pool may terminate the Worker, so nothing is left for its exit
+    rule_profiler.flush()
+    stats_collector.flush()
+    return results
+
+
+@contextmanager
+def progress_display(progress=None):
+    """
+    Use the given Progress, or show a new one
+    """
+    if progress:
+        yield progress
+        return
+    with Progress(SpinnerColumn(),
+                  MofNCompleteColumn(),
+                  *Progress.get_default_columns(),
+                  TimeElapsedColumn()) as new_progress:
+        yield new_progress
 
-    clusters = []
-    cluster_updates = []
 
-    checkmk_hosts = {}
-    existing_folders = []
-    existing_folders_attributes = {}
-    custom_folder_attributes = {}
+class SyncCMK2(CMK2):
+    """
+    Sync Functions
+    """
+    #log_details = []
 
     label_prefix = False
     only_update_prefixed_labels = False
@@ -41,12 +94,60 @@ class SyncCMK2(CMK2):
 
     num_created = 0
     num_updated  = 0
+    num_skipped = 0
     num_deleted  = 0
 
+    _bulk_dispatcher = None
+
     console = None
 
     limit = False
 
+    def __init__(self, account=False):
+        """
+        Init, the Bookkeeping belongs to the Run
+        """
+        super().__init__(account)
+        self.bulk_creates = []
+        self.bulk_updates = []
+
+        self.disabled_hosts = []
+
+        # Sets, they are checked for every Host
+        self.synced_hosts = set()
+        self.existing_folders = set()
+
+        self.clusters = []
+        self.cluster_updates = []
+
+        self.checkmk_hosts = {}
+        self.existing_folders_attributes = {}
+        self.custom_folder_attributes = {}
+
+        # Fingerprints of the last Export: hostname -> (target, checkmk)
+        self.export_fingerprints = {}
+        self.new_export_fingerprints = {}
+
+    @property
+    def bulk_dispatcher(self):
+        """
+        Sends the Bulk Requests, CMK_BULK_MAX_IN_FLIGHT at once
+        """
+        if not self._bulk_dispatcher:
+            self._bulk_dispatcher = BulkDispatcher(app.config['CMK_BULK_MAX_IN_FLIGHT'])
+        return self._bulk_dispatcher
+
+    def send_bulk_chunk(self, url, method, chunk):
+        """
+        Send one Bulk Request, returns the CmkException or None.
+        Runs in a Thread of the bulk_dispatcher
+        """
+        try:
+            self.request(url, method=method, data={'entries': chunk})
+        except CmkException as error:
+            return error
+        return None
+
     @staticmethod
     def chunks(lst, n):
         """Yield successive n-sized chunks from lst."""
@@ -77,16 +178,13 @@ class SyncCMK2(CMK2):
                     if config_path not in self.custom_folder_attributes:
                         self.custom_folder_attributes[config_path] = ast.literal_eval(splitted[1])
 
-    def fetch_checkmk_folders(self):
+    def fetch_checkmk_folders(self, progress=None):
         """
         Fetch list of Folders in Checkmk
         """
         url = "domain-types/folder_config/collections/all"
         url += "?parent=/&recursive=true&show_hosts=false"
-        with Progress(SpinnerColumn(),
-                      MofNCompleteColumn(),
-                      *Progress.get_default_columns(),
-                      TimeElapsedColumn()) as progress:
+        with progress_display(progress) as progress:
             task1 = progress.add_task("Fetching Current Folders", start=False)
             api_folders = self.request(url, method="GET")
             if not api_folders[0]:
@@ -98,7 +196,7 @@ class SyncCMK2(CMK2):
                 attributes = folder['extensions']['attributes']
                 self.existing_folders_attributes[path] = attributes
                 self.existing_folders_attributes[path].update({'title': folder['title']})
-                self.existing_folders.append(path)
+                self.existing_folders.add(path)
 
     def handle_folders(self):
         """
@@ -183,66 +281,88 @@ class SyncCMK2(CMK2):
                       f"({update_attributes})")
 
 
-    def _fetch_all_checkmk_hosts(self):
+    def _fetch_all_checkmk_hosts(self, progress=None):
         """
         Classic full Fetch
         """
         url = "domain-types/host_config/collections/all"
-        with Progress(SpinnerColumn(),
-                      MofNCompleteColumn(),
-                      *Progress.get_default_columns(),
-                      TimeElapsedColumn()) as progress:
-            task1 = progress.add_task("Fetching Hosts", start=False)
+        with progress_display(progress) as progress:
+            task1 = progress.add_task("Fetching Hosts", total=None)
             progress.console.print("Waiting for Checkmk Response")
-            api_hosts = self.request(url, method="GET")
-            progress.update(task1, total=len(api_hosts[0]['value']), start=True)
-            for host in api_hosts[0]['value']:
-                self.checkmk_hosts[host['id']] = host
-                progress.update(task1, advance=1)
-
+            # The Response is parsed while it is downloaded,
+            # only the compact Hosts are kept
+            response = self.stream_request(url)
+            with response:
+                for host in iter_json_array(response.iter_content(chunk_size=64 * 1024),
+                                            'value'):
+                    self.checkmk_hosts[host['id']] = CheckmkHost.from_api(host)
+                    progress.update(task1, advance=1)
 
 
-    def _get_hosts_of_folder(self, folder, return_dict):
-        """ Get Hosts of given folder """
-        folder = folder.replace('/','~')
-        url = f"objects/folder_config/{folder}/collections/hosts"
-        api_hosts = self.request(url, method="GET")
-        for host in api_hosts[0]['value']:
-            return_dict[host['id']] = host
 
-    def _fetch_checkmk_host_by_folder(self):
+    def _get_hosts_of_folder(self, folder):
+        """
+        Get Hosts of given folder, as compact Hosts.
+        Failed Requests are repeated CMK_FOLDER_FETCH_RETRIES times
+        """
+        url = f"objects/folder_config/{folder.replace('/','~')}/collections/hosts"
+        retries = app.config['CMK_FOLDER_FETCH_RETRIES']
+        for attempt in range(retries + 1):
+            hosts = {}
+            try:
+                response = self.stream_request(url)
+                with response:
+                    for host in iter_json_array(response.iter_content(chunk_size=64 * 1024),
+                                                'value'):
+                        hosts[host['id']] = CheckmkHost.from_api(host)
+                return hosts
+            except (CmkException, requests.exceptions.RequestException, ValueError) as error:
+                if attempt >= retries:
+                    raise
+                logger.debug(f"Fetch of Folder {folder} failed ({error}), try again")
+                time.sleep(app.config['HTTP_REPEAT_TIMEOUT'])
+        return {}
+
+    def _fetch_checkmk_host_by_folder(self, progress=None):
         """
         Check the folder Structure and get hosts
-        whit multiple request
+        whit multiple request, CMK_FOLDER_FETCH_IN_FLIGHT at the same time
         """
-        with Progress(SpinnerColumn(),
-                      MofNCompleteColumn(),
-                      *Progress.get_default_columns(),
-                      TimeElapsedColumn()) as progress:
+        with progress_display(progress) as progress:
             num_folders = len(self.existing_folders)
 
             task1 = progress.add_task("Fetching Hosts folder by folder", total=num_folders)
-            manager = multiprocessing.Manager()
-            return_dict = manager.dict()
-            with multiprocessing.Pool() as pool:
-                for folder in self.existing_folders:
-                    pool.apply_async(self._get_hosts_of_folder,
-                                     args=(folder, return_dict,),
-                                     callback=lambda x: progress.advance(task1))
-
-                pool.close()
-                pool.join()
-                self.checkmk_hosts.update(return_dict)
+            in_flight = app.config['CMK_FOLDER_FETCH_IN_FLIGHT']
+            with ThreadPoolExecutor(max_workers=in_flight) as executor:
+                tasks = {executor.submit(self._get_hosts_of_folder, folder): folder \
+                            for folder in self.existing_folders}
+                for task in as_completed(tasks):
+                    try:
+                        self.checkmk_hosts.update(task.result())
+                    except (CmkException, requests.exceptions.RequestException,
+                            ValueError) as error:
+                        self.log_details.append(('error',
+                                                 f"Fetch of Folder {tasks[task]} failed: {error}"))
+                        progress.console.print(f"- ERROR: Fetch of Folder {tasks[task]} "\
+                                               f"failed ({error})")
+                    progress.advance(task1)
 
 
-    def fetch_checkmk_hosts(self):
+    def fetch_checkmk_hosts(self, progress=None):
         """
         Fetch all host currently in Checkmk
         """
         if app.config['CMK_GET_HOST_BY_FOLDER']:
-            self._fetch_checkmk_host_by_folder()
+            self._fetch_checkmk_host_by_folder(progress)
         else:
-            self._fetch_all_checkmk_hosts()
+            self._fetch_all_checkmk_hosts(progress)
+
+    def fetch_checkmk(self, progress=None):
+        """
+        Fetch Folders and Hosts currently in Checkmk
+        """
+        self.fetch_checkmk_folders(progress)
+        self.fetch_checkmk_hosts(progress)
 
 
     def use_host(self, hostname, source_account_name):
@@ -286,7 +406,7 @@ class SyncCMK2(CMK2):
             return
         delete_list = []
         for host, host_data in self.checkmk_hosts.items():
-            host_labels = host_data['extensions']['attributes'].get('labels',{})
+            host_labels = host_data.attributes.get('labels',{})
             if host_labels.get('cmdb_syncer') == self.account_id:
                 if host not in self.synced_hosts:
                     # Delete host
@@ -310,30 +430,44 @@ class SyncCMK2(CMK2):
             url = "/domain-types/host_config/actions/bulk-delete/invoke"
             chunks = list(self.chunks(delete_list, app.config['CMK_BULK_DELETE_OPERATIONS']))
             total = len(chunks)
-            count = 1
-            for chunk in chunks:
-                self.num_deleted += len(chunk)
+            for count, chunk in enumerate(chunks, start=1):
                 print(f" * Send Bulk Request {count}/{total}")
-                try:
-                    self.request(url, data={'entries': chunk }, method="POST")
-                except CmkException as exp:
-                    self.log_details.append(("error", f"Host Bulk deletion failed: {exp}"))
-                    print(f"{CC.WARNING} *{CC.ENDC} Bulk Host deletion failed failed {exp}")
-                else:
-                    count += 1
-                self.num_deleted += len(chunk)
+                self.bulk_dispatcher.submit(self.send_bulk_chunk, (url, "POST", chunk),
+                                            partial(self._bulk_delete_done, chunk))
+            self.bulk_dispatcher.wait()
+
+    def _bulk_delete_done(self, chunk, error):
+        """
+        Result of a Bulk Delete Request
+        """
+        if error:
+            self.log_details.append(("error", f"Host Bulk deletion failed: {error}"))
+            self.log_details.append(('error_affected', str(chunk)))
+            print(f"{CC.WARNING} *{CC.ENDC} Bulk Host deletion failed failed {error}")
+        else:
+            self.num_deleted += len(chunk)
 
 
-    def handle_host(self, db_host, host_actions, disabled_hosts):
+    def calculate_host(self, db_host):
         """
-        All Calculation for a Host
+        All Calculation for a Host,
+        returns Actions and Attributes, or None if the Host is disabled
         """
         attributes = self.get_host_attributes(db_host, 'checkmk')
         if not attributes:
+            return None
+        next_actions = self.get_host_actions(db_host, attributes['all'])
+        return next_actions, attributes
+
+    def handle_host(self, db_host, host_actions, disabled_hosts):
+        """
+        All Calculation for a Host
+        """
+        result = self.calculate_host(db_host)
+        if not result:
             disabled_hosts.append(db_host.hostname)
             return False
-        next_actions = self.get_host_actions(db_host, attributes['all'])
-        host_actions[db_host.hostname] = (next_actions, attributes)
+        host_actions[db_host.hostname] = result
         return True
 
 
@@ -352,7 +486,7 @@ class SyncCMK2(CMK2):
             if create_folder not in self.existing_folders:
                 # We may need to create them later
                 self.create_folder(create_folder)
-                self.existing_folders.append(create_folder)
+                self.existing_folders.add(create_folder)
 
         if 'move_folder' in next_actions:
             # Get the Folder where we move to
@@ -363,10 +497,62 @@ class SyncCMK2(CMK2):
             if folder not in self.existing_folders:
                 # We may need to create them later
                 self.create_folder(folder)
-                self.existing_folders.append(folder)
+                self.existing_folders.add(folder)
 
         return folder
 
+#   .-- Export Fingerprints
+    def load_export_fingerprints(self):
+        """
+        Fingerprints of the last Export to this Account
+        """
+        if not app.config['CMK_EXPORT_FINGERPRINTS']:
+            return
+        query = CheckmkExportFingerprint.objects(account=self.account_id)\
+                    .only('hostname', 'target', 'checkmk').as_pymongo()
+        self.export_fingerprints = {x['hostname']: (x.get('target'), x.get('checkmk'))
+                                    for x in query}
+
+    def is_unchanged(self, hostname, target):
+        """
+        True if the Host matched Checkmk in an earlier Export,
+        and neither the Syncer nor Checkmk changed since.
+        """
+        if hostname not in self.export_fingerprints \
+                or hostname not in self.checkmk_hosts:
+            return False
+        last_target, last_checkmk = self.export_fingerprints[hostname]
+        if target != last_target:
+            return False
+        return self.checkmk_hosts[hostname].fingerprint() == last_checkmk
+
+    def save_export_fingerprints(self, cleanup=True):
+        """
+        Store the Fingerprints of Hosts found in Sync.
+        With cleanup, the ones of Hosts not longer exported are deleted
+        """
+        if not app.config['CMK_EXPORT_FINGERPRINTS']:
+            return
+        now = datetime.datetime.now()
+        operations = []
+        for hostname, (target, checkmk) in self.new_export_fingerprints.items():
+            if self.export_fingerprints.get(hostname) == (target, checkmk):
+                continue
+            operations.append(UpdateOne({'account': self.account_id, 'hostname': hostname},
+                                        {'$set': {'target': target, 'checkmk': checkmk,
+                                                  'last_update': now}},
+                                        upsert=True))
+        for chunk in self.chunks(operations, 1000):
+            CheckmkExportFingerprint._get_collection().bulk_write(chunk, ordered=False)
+        if cleanup:
+            outdated = [x for x in self.export_fingerprints if x not in self.synced_hosts]
+            for chunk in self.chunks(outdated, 1000):
+                CheckmkExportFingerprint.objects(account=self.account_id,
+                                                 hostname__in=chunk).delete()
+        self.new_export_fingerprints = {}
+
+#.
+
 
     def handle_attributes(self, next_actions, attributes):
         """
@@ -411,11 +597,13 @@ class SyncCMK2(CMK2):
                                     remove_attributes, dont_move_host,
                                     dont_update_host, dont_create_host):
         """
-        Do creation or update actions
+        Do creation or update actions.
+        Returns True if the Host already matched Checkmk
         """
         is_cluster = False
         if cluster_nodes:
             is_cluster = True
+        in_sync = False
         if hostname not in self.checkmk_hosts:
             # If here so that it not goes into update mode
             if not dont_create_host:
@@ -431,16 +619,11 @@ class SyncCMK2(CMK2):
                 # Add Host information to the dict, for later cleanup.
                 # So no need to query all the hosta again
                 self.checkmk_hosts[hostname] = \
-                            {'extensions': {
-                                'attributes':{
-                                     'labels': {
-                                          'cmdb_syncer': self.account_id
-                                }}
-                             }}
+                            CheckmkHost(folder, {'labels': {'cmdb_syncer': self.account_id}})
         elif not dont_update_host:
             cmk_host = self.checkmk_hosts[hostname]
 
-            if is_cluster and not cmk_host['extensions']['is_cluster']:
+            if is_cluster and not cmk_host.is_cluster:
                 url = f"/objects/host_config/{hostname}"
                 try:
                     self.request(url, method="DELETE")
@@ -457,63 +640,78 @@ class SyncCMK2(CMK2):
 
 
             # Update if needed
-            self.update_host(hostname, cmk_host, folder,
-                            labels, additional_attributes, remove_attributes,
-                            dont_move_host)
+            in_sync = self.update_host(hostname, cmk_host, folder,
+                                       labels, additional_attributes, remove_attributes,
+                                       dont_move_host)
             if is_cluster:
-                cmk_cluster = cmk_host['extensions']['cluster_nodes']
+                cmk_cluster = cmk_host.cluster_nodes
                 self.cluster_updates.append((hostname, cmk_cluster, cluster_nodes))
+                if sorted(cmk_cluster) != sorted(cluster_nodes):
+                    in_sync = False
         else:
             self.console(" * Host is not to be updated")
+        return in_sync
 
 
 
-    def calculate_attributes_and_rules(self):
+    def calculate_attributes_and_rules(self, background=None):
         """
-        Calculate Attributes and Rules
+        Calculate Attributes and Rules.
+        If set, background(progress) runs in a Thread during the Calculation,
+        and is finished when this returns.
         """
         object_filter = self.config['settings'].get(self.name, {}).get('filter')
         db_objects = Host.objects_by_filter(object_filter)
         total = db_objects.count()
+        self.compile_rules()
+        if app.config['CMK_BATCH_RULE_EVALUATION']:
+            return self.calculate_attributes_batch(db_objects, total, background)
 
         with Progress(SpinnerColumn(),
                       MofNCompleteColumn(),
                       *Progress.get_default_columns(),
                       TimeElapsedColumn()) as progress:
             task1 = progress.add_task("Calculating Hostrules and Attributes", total=total)
-            manager = multiprocessing.Manager()
-            host_actions = manager.dict()
-            disabled_hosts = manager.list()
-            with multiprocessing.Pool() as pool:
-                tasks = []
-                for db_host in db_objects:
-                    if not self.use_host(db_host.hostname, db_host.source_account_name):
-                        progress.advance(task1)
-                        continue
-                    task = pool.apply_async(self.handle_host,
-                                     args=(db_host, host_actions, disabled_hosts),
-                                     callback=lambda x: progress.advance(task1))
-                    tasks.append(task)
-                    #@TODO
-                    # .get() slows the process, console print is not up to date
-                    # New concept will be needed for outputs
-                    progress.console.print(f"- Started on {db_host.hostname}")
-                    #result = x.get()
-                    #if not result:
-                    #    progress.console.print("--> !! Host Disabled")
-
-                progress.console.print("Waiting for Calculation to finish")
-                for task in tasks:
+            host_actions = {}
+            disabled_hosts = []
+            host_ids = []
+            for raw in db_objects.only('hostname', 'source_account_name').as_pymongo():
+                if self.use_host(raw['hostname'], raw.get('source_account_name')):
+                    host_ids.append(raw['_id'])
+                else:
+                    progress.advance(task1)
+
+            chunk_size = app.config['CMK_CALCULATION_CHUNK_SIZE']
+            chunks = list(self.chunks(host_ids, chunk_size))
+            workers = app.config['CMK_CALCULATION_WORKERS'] or None
+            with create_pool(processes=workers,
+                             initializer=init_worker, initargs=(self,)) as pool, \
+                    ThreadPoolExecutor(max_workers=1) as executor:
+                # Started after the Workers are forked, so they don't inherit the Thread
+                background_task = executor.submit(background, progress) if background else None
+                results = pool.imap_unordered(calculate_chunk, chunks)
+                for _chunk in chunks:
                     try:
-                        task.get(timeout=app.config['PROCESS_TIMEOUT'])
-                    except multiprocessing.TimeoutError:
-                        progress.console.print("- ERROR: Timout for a object")
-                    except Exception as error:
-                        if self.debug:
-                            raise
-                        progress.console.print(f"- ERROR: Timout error for object ({error})")
+                        chunk_results = results.next(timeout=app.config['CMK_CHUNK_TIMEOUT'])
+                    except multiprocessing.TimeoutError as error:
+                        # Hosts of the missing Chunks would be deleted by the Cleanup,
+                        # so the whole Run stops here
+                        pool.terminate()
+                        raise CmkException("Timeout in the Calculation, Sync stopped") \
+                                from error
+                    for hostname, result, error in chunk_results:
+                        if error:
+                            progress.console.print(f"- ERROR: Calculation failed "\
+                                                   f"for {hostname} ({error})")
+                        elif result:
+                            host_actions[hostname] = result
+                        else:
+                            disabled_hosts.append(hostname)
+                    progress.advance(task1, len(chunk_results))
                 pool.close()
                 pool.join()
+                if background_task:
+                    background_task.result()
 
 
                 if self.config.get('list_disabled_hosts'):
@@ -522,9 +720,79 @@ class SyncCMK2(CMK2):
                     for host in disabled_hosts:
                         progress.advance(task2)
                         progress.console.print(f"- Disabled-> {host} disabled")
-        return dict(host_actions)
+        return host_actions
+
+
+
+    def handle_host_batch(self, db_hosts, host_actions, disabled_hosts):
+        """
+        All Calculation for a batch of Hosts,
+        every Rule set is evaluated for all of them at once
+        """
+        try:
+            Host.prefetch_cache(db_hosts)
+            self.prepare_attributes_batch(db_hosts, 'checkmk')
+            entries = []
+            for db_host in db_hosts:
+                try:
+                    attributes = self.get_host_attributes(db_host, 'checkmk')
+                except Exception: # pylint: disable=broad-except
+                    # Reported by handle_host
+                    continue
+                if attributes:
+                    entries.append((db_host, attributes['all']))
+            self.actions.prepare_batch(entries)
+
+            for db_host in db_hosts:
+                try:
+                    self.handle_host(db_host, host_actions, disabled_hosts)
+                except Exception as error:
+                    if self.debug:
+                        raise
+                    print(f"- ERROR: Calculation failed for {db_host.hostname} ({error})")
+        finally:
+            self.finish_batch()
 
 
+    def calculate_attributes_batch(self, db_objects, total, background=None):
+        """
+        Calculate Attributes and Rules in the main process,
+        in batches of Hosts
+        """
+        host_actions = {}
+        disabled_hosts = []
+        batch_size = app.config['RULE_BATCH_SIZE']
+        with Progress(SpinnerColumn(),
+                      MofNCompleteColumn(),
+                      *Progress.get_default_columns(),
+                      TimeElapsedColumn()) as progress, \
+                ThreadPoolExecutor(max_workers=1) as executor:
+            background_task = executor.submit(background, progress) if background else None
+            task1 = progress.add_task("Calculating Hostrules and Attributes", total=total)
+            batch = []
+            for db_host in Host.iter_hosts(db_objects):
+                if not self.use_host(db_host.hostname, db_host.source_account_name):
+                    progress.advance(task1)
+                    continue
+                batch.append(db_host)
+                if len(batch) >= batch_size:
+                    self.handle_host_batch(batch, host_actions, disabled_hosts)
+                    progress.advance(task1, len(batch))
+                    batch = []
+            if batch:
+                self.handle_host_batch(batch, host_actions, disabled_hosts)
+                progress.advance(task1, len(batch))
+            if background_task:
+                background_task.result()
+
+            if self.config.get('list_disabled_hosts'):
+                task2 = progress.add_task("List Disabled Hosts", total=total)
+                self.disabled_hosts = disabled_hosts
+                for host in disabled_hosts:
+                    progress.advance(task2)
+                    progress.console.print(f"- Disabled-> {host} disabled")
+        return host_actions
+
 
 #   .-- Run Sync
     def run(self):
@@ -534,13 +802,15 @@ class SyncCMK2(CMK2):
         self.name=f"Sync Hosts to Account: {self.account_name}"
         self.source="checkmk_host_export"
 
+        if app.config['CMK_PIPELINED_RUN']:
+            # Checkmk is queried while the Rules are calculated,
+            # the Actions need both
+            host_actions = self.calculate_attributes_and_rules(background=self.fetch_checkmk)
+        else:
+            self.fetch_checkmk()
+            host_actions = self.calculate_attributes_and_rules()
 
-        self.fetch_checkmk_folders()
-        self.fetch_checkmk_hosts()
-
-        ## Start SYNC of Hosts into CMK
-
-        host_actions = self.calculate_attributes_and_rules()
+        self.load_export_fingerprints()
 
         total = len(host_actions)
         print(f"\n{CC.OKCYAN} -- {CC.ENDC}Start Sync")
@@ -567,7 +837,7 @@ class SyncCMK2(CMK2):
                 self.dont_update_prefixed_labels = next_actions.get('dont_update_prefixed_labels')
 
 
-                self.synced_hosts.append(hostname)
+                self.synced_hosts.add(hostname)
                 labels['cmdb_syncer'] = self.account_id
 
                 dont_move_host = next_actions.get('dont_move', False)
@@ -585,6 +855,22 @@ class SyncCMK2(CMK2):
                 additional_attributes, remove_attributes = \
                         self.handle_attributes(next_actions, attributes)
 
+                # Before the Update, since it changes labels and remove_attributes
+                target_fingerprint = export_fingerprint([
+                    folder, labels, additional_attributes, sorted(remove_attributes),
+                    sorted(cluster_nodes), label_prefix,
+                    self.only_update_prefixed_labels, self.dont_update_prefixed_labels,
+                    dont_move_host, dont_update_host, dont_create_host,
+                ])
+                if self.is_unchanged(hostname, target_fingerprint):
+                    self.num_skipped += 1
+                    progress.console.print(" * Unchanged since last Export")
+                    progress.advance(task1)
+                    continue
+                checkmk_fingerprint = None
+                if hostname in self.checkmk_hosts:
+                    checkmk_fingerprint = self.checkmk_hosts[hostname].fingerprint()
+
                 export_details += [
                   ('add_attributes', str(additional_attributes)),
                   ('remove_attributes', str(additional_attributes)),
@@ -595,10 +881,12 @@ class SyncCMK2(CMK2):
                         source="checkmk_host_export_details", details=export_details)
 
 
-                self.create_or_update_host(hostname, folder, labels,
-                                      cluster_nodes, additional_attributes,
-                                      remove_attributes, dont_move_host,
-                                      dont_update_host, dont_create_host)
+                if self.create_or_update_host(hostname, folder, labels,
+                                              cluster_nodes, additional_attributes,
+                                              remove_attributes, dont_move_host,
+                                              dont_update_host, dont_create_host):
+                    self.new_export_fingerprints[hostname] = \
+                            (target_fingerprint, checkmk_fingerprint)
                 progress.advance(task1)
 
 
@@ -607,8 +895,11 @@ class SyncCMK2(CMK2):
             self.send_bulk_create_host(self.bulk_creates)
         if self.bulk_updates:
             self.send_bulk_update_host(self.bulk_updates)
+        # Clusters need their Nodes
+        self.bulk_dispatcher.wait()
 
         if self.limit:
+            self.save_export_fingerprints(cleanup=False)
             log.log(f"Finished Sync to Checkmk Account: {self.account_name} because LIMIT",
                     source="checkmk_host_export", details=self.log_details)
             print(f"\n{CC.OKCYAN} -- {CC.ENDC}Stop processing in limit mode")
@@ -617,12 +908,14 @@ class SyncCMK2(CMK2):
         self.handle_clusters()
         self.cleanup_hosts()
         self.handle_folders()
+        self.save_export_fingerprints()
 
 
         self.log_details.append(('num_total', str(total)))
         self.log_details.append(('num_created', str(self.num_created)))
         self.log_details.append(('num_updated', str(self.num_updated)))
         self.log_details.append(('num_deleted', str(self.num_deleted)))
+        self.log_details.append(('num_skipped_unchanged', str(self.num_skipped)))
         self.log_details.append(('disabled_hosts', str(self.disabled_hosts)))
 
 #.
@@ -641,7 +934,7 @@ class SyncCMK2(CMK2):
         if parent != '/':
             mid_char = '/'
         full_foldername = f'{parent}{mid_char}{subfolder}'
-        self.existing_folders.append(full_foldername)
+        self.existing_folders.add(full_foldername)
         if extra_opts := self.custom_folder_attributes.get(full_foldername):
             body.update({'attributes': extra_opts})
         try:
@@ -687,18 +980,22 @@ class SyncCMK2(CMK2):
         """
         chunks = list(self.chunks(entries, app.config['CMK_BULK_CREATE_OPERATIONS']))
         total = len(chunks)
-        count = 1
-        for chunk in chunks:
+        url = "/domain-types/host_config/actions/bulk-create/invoke"
+        for count, chunk in enumerate(chunks, start=1):
             self.console(f" * Send Bulk Create Request {count}/{total}")
-            count += 1
-            url = "/domain-types/host_config/actions/bulk-create/invoke"
-            try:
-                self.request(url, method="POST", data={'entries': chunk})
-                self.num_created += len(chunk)
-            except CmkException as error:
-                self.log_details.append(('error', f"Bulk Create Error: {error}"))
-                self.log_details.append(('error_affected', str([x['host_name'] for x in chunk])))
-                self.console(f" * CMK API ERROR {error}")
+            self.bulk_dispatcher.submit(self.send_bulk_chunk, (url, "POST", chunk),
+                                        partial(self._bulk_create_done, chunk))
+
+    def _bulk_create_done(self, chunk, error):
+        """
+        Result of a Bulk Create Request
+        """
+        if error:
+            self.log_details.append(('error', f"Bulk Create Error: {error}"))
+            self.log_details.append(('error_affected', str([x['host_name'] for x in chunk])))
+            self.console(f" * CMK API ERROR {error}")
+        else:
+            self.num_created += len(chunk)
 
     def add_bulk_create_host(self, body):
         """
@@ -811,34 +1108,49 @@ class SyncCMK2(CMK2):
 
 #.
 #   .-- Update Host
-    def send_bulk_update_host(self, entries):
+    def send_bulk_update_host(self, host_entries):
         """
-        Send Update requests to CMK
+        Send Update requests to CMK.
+        Moves are done before, they are not sent in Bulk.
+        host_entries has a list of Payloads per Host. They stay in one Chunk,
+        since the Chunks are sent concurrently and the Payloads depend on their Order.
         """
-        chunks = list(self.chunks(entries, app.config['CMK_BULK_UPDATE_OPERATIONS']))
+        max_size = int(app.config['CMK_BULK_UPDATE_OPERATIONS'])
+        chunks = []
+        chunk = []
+        for entries in host_entries:
+            if chunk and len(chunk) + len(entries) > max_size:
+                chunks.append(chunk)
+                chunk = []
+            chunk += entries
+        if chunk:
+            chunks.append(chunk)
         total = len(chunks)
-        count = 1
-        for chunk in chunks:
+        url = "/domain-types/host_config/actions/bulk-update/invoke"
+        for count, chunk in enumerate(chunks, start=1):
             self.console(f" * Send Bulk Update Request {count}/{total}")
-            url = "/domain-types/host_config/actions/bulk-update/invoke"
-            try:
-                count += 1
-                self.request(url, method="PUT",
-                             data={'entries': chunk},
-                            )
-                self.num_updated += len(chunk)
-            except CmkException as error:
-                self.log_details.append(('error', f"CMK API Error: {error}"))
-                self.log_details.append(('error_affected', str([x['host_name'] for x in chunk])))
-                self.console(f" * CMK API ERROR {error}")
+            self.bulk_dispatcher.submit(self.send_bulk_chunk, (url, "PUT", chunk),
+                                        partial(self._bulk_update_done, chunk))
 
-    def add_bulk_update_host(self, body):
+    def _bulk_update_done(self, chunk, error):
         """
-        Add a Host to bulk list, and Send
+        Result of a Bulk Update Request
+        """
+        if error:
+            self.log_details.append(('error', f"CMK API Error: {error}"))
+            self.log_details.append(('error_affected', str([x['host_name'] for x in chunk])))
+            self.console(f" * CMK API ERROR {error}")
+        else:
+            self.num_updated += len(chunk)
+
+    def add_bulk_update_host(self, entries):
+        """
+        Add the Payloads of a Host to bulk list, and Send
         """
-        self.bulk_updates.append(body)
+        self.bulk_updates.append(entries)
         if not app.config['CMK_COLLECT_BULK_OPERATIONS'] and \
-                len(self.bulk_updates) >= int(app.config['CMK_BULK_UPDATE_OPERATIONS']):
+                sum(len(x) for x in self.bulk_updates) \
+                    >= int(app.config['CMK_BULK_UPDATE_OPERATIONS']):
             self.send_bulk_update_host(self.bulk_updates)
             self.bulk_updates = []
 
@@ -846,9 +1158,10 @@ class SyncCMK2(CMK2):
                     labels, additional_attributes, remove_attributes, \
                     dont_move_host):
         """
-        Update an Existing Host in Checkmk
+        Update an Existing Host in Checkmk.
+        Returns True if nothing needed to be changed
         """
-        current_folder = cmk_host['extensions']['folder']
+        current_folder = cmk_host.folder
         # Hack slash in front, quick solution before redesign
         if not current_folder.startswith('/'):
             current_folder = "/" + current_folder
@@ -859,7 +1172,7 @@ class SyncCMK2(CMK2):
         if current_folder.endswith('/') and current_folder != '/':
             current_folder = current_folder[:-1]
 
-        logger.debug(f"Checkmk Body: {cmk_host}")
+        logger.debug(f"Checkmk Host: {cmk_host.folder} {cmk_host.attributes}")
 
 
         etag = False
@@ -867,7 +1180,9 @@ class SyncCMK2(CMK2):
         check_folder = folder
         if app.config['CMK_SUPPORT'] == '2.2' and folder.endswith('/'):
             check_folder = folder[:-1]
+        moved = False
         if not dont_move_host and current_folder != check_folder:
+            moved = True
             etag = self.get_etag(hostname, "Move Host")
             update_headers = {
                 'if-match': etag
@@ -904,7 +1219,7 @@ class SyncCMK2(CMK2):
         do_update_attributes = False
         do_remove_attributes = False
         update_reasons = []
-        cmk_attributes = cmk_host['extensions']['attributes']
+        cmk_attributes = cmk_host.attributes
         cmk_labels = cmk_attributes.get('labels', {})
 
         if self.dont_update_prefixed_labels:
@@ -977,6 +1292,7 @@ class SyncCMK2(CMK2):
 
             # CHeckmk currently fails if you send labels and tags the same time
             # and you cant send update and remove attributes at the same time
+            bulk_entries = []
             for what in ['attributes', 'update_attributes',
                          'remove_attributes', 'labels', 'tags']:
                 if what in update_body:
@@ -1016,8 +1332,11 @@ class SyncCMK2(CMK2):
                             self.console(f"   Reasons: {what}: {', '.join(update_reasons)}")
                     else:
                         payload['host_name'] = hostname
-                        self.add_bulk_update_host(payload)
+                        bulk_entries.append(payload)
                         self.console(f" * Add to Bulk Update List for {what} update")
+            if bulk_entries:
+                self.add_bulk_update_host(bulk_entries)
+        return not moved and not do_update
 
 
 #.
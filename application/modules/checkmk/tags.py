@@ -5,13 +5,16 @@ Checkmk Tag Syncronize
 import ast
 import multiprocessing
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn, MofNCompleteColumn
-from application import logger
+from application import logger, create_pool
 from application.modules.checkmk.cmk2 import CMK2
 from application.modules.debug import ColorCodes as CC
 from application.modules.checkmk.models import CheckmkTagMngmt
 from application.models.host import Host
 from application.helpers.syncer_jinja import render_jinja
-from application.modules.checkmk.helpers import cmk_cleanup_tag_id
+from application.modules.checkmk.helpers import cmk_cleanup_tag_id, export_fingerprint
+from application.modules.rule.outcome_cache import outcome_key
+from application.modules.rule.compiler import stats_collector
+from application.modules.rule.profiling import rule_profiler
 
 class CheckmkTagSync(CMK2):
     """
@@ -20,38 +23,57 @@ class CheckmkTagSync(CMK2):
     groups = {}
 
 
-    def build_caches(self, db_host, groups, multiply_expressions):
+    @staticmethod
+    def get_cached(db_host, cache_name, fingerprint):
+        """
+        Content of the Host Cache, if it is still valid for the fingerprint
+        """
+        entry = db_host.cache.get(cache_name)
+        if fingerprint and isinstance(entry, dict) and entry.get('fingerprint') == fingerprint:
+            return entry['outcomes']
+        return None
+
+    def build_caches(self, db_host, groups, multiply_expressions, rules_version=None):
         """
         Calculation of rules and Host Tags
         """
         object_attributes = self.get_host_attributes(db_host, 'cmk_conf')
+        # The Caches are valid as long as the Tag Rules and the Attributes are the same
+        fingerprint = outcome_key('cmk_tags', rules_version,
+                                  [object_attributes['all'],
+                                   db_host.get_inventory().get('syncer_account')],
+                                  db_host.hostname)
 
         tags_of_host = {}
         addional_groups = {}
         if multiply_expressions:
             cache_name_tags = 'cmk_tags_multiply_tags'
             cache_name_groups = 'cmk_tags_multiply_groups'
-            if cache_name_tags not in db_host.cache or \
-                    cache_name_groups not in db_host.cache:
+            tags_of_host = self.get_cached(db_host, cache_name_tags, fingerprint)
+            addional_groups = self.get_cached(db_host, cache_name_groups, fingerprint)
+            if tags_of_host is None or addional_groups is None:
                 tags_of_host, addional_groups = \
                             self.check_for_multi_groups(object_attributes,
                                                         groups,
                                                         multiply_expressions)
-                db_host.cache[cache_name_tags] = tags_of_host
-                db_host.cache[cache_name_groups] = addional_groups
-
-            tags_of_host = db_host.cache[cache_name_tags]
-            addional_groups = db_host.cache[cache_name_groups]
+                db_host.cache[cache_name_tags] = {'fingerprint': fingerprint,
+                                                  'outcomes': tags_of_host}
+                db_host.cache[cache_name_groups] = {'fingerprint': fingerprint,
+                                                    'outcomes': addional_groups}
             groups.update(addional_groups)
 
 
         cache_name = 'cmk_tags_tag_choices'
-        if cache_name not in db_host.cache:
+        if self.get_cached(db_host, cache_name, fingerprint) is None:
             logger.debug(f" -- Build Tag Cache {cache_name}")
             hosts_tags = self.get_tags_for_host(db_host, object_attributes,
                                                       groups, tags_of_host)
-            db_host.cache[cache_name] = hosts_tags
+            db_host.cache[cache_name] = {'fingerprint': fingerprint,
+                                         'outcomes': hosts_tags}
         db_host.save()
+        # Runs in a Pool Worker, which may be terminated before its exit
+        rule_profiler.flush()
+        stats_collector.flush()
 
 
     def calculate_rules(self):
@@ -68,7 +90,7 @@ class CheckmkTagSync(CMK2):
             manager = multiprocessing.Manager()
             base_groups = manager.dict()
             multiply_expressions = manager.list()
-            with multiprocessing.Pool() as pool:
+            with create_pool() as pool:
                 for rule in db_objects:
                     pool.apply_async(self.create_inital_groups,
                                      args=(rule, base_groups, multiply_expressions),
@@ -83,6 +105,7 @@ class CheckmkTagSync(CMK2):
         Export Tags to Checkmk
         """
         base_groups, multiply_expressions = self.calculate_rules()
+        rules_version = export_fingerprint([base_groups, multiply_expressions])
 
         object_filter = self.config['settings'].get(self.name, {}).get('filter')
         db_objects = Host.objects_by_filter(object_filter)
@@ -99,18 +122,18 @@ class CheckmkTagSync(CMK2):
             mlt_expressions += multiply_expressions
 
             task1 = progress.add_task("Calculating Caches", total=total)
-            with multiprocessing.Pool() as pool:
-                for entry in db_objects:
+            with create_pool() as pool:
+                for entry in Host.iter_hosts(db_objects, views=True):
                     pool.apply_async(self.build_caches,
-                                     args=(entry, groups, mlt_expressions),
+                                     args=(entry, groups, mlt_expressions, rules_version),
                                      callback=lambda x: progress.advance(task1))
                 pool.close()
                 pool.join()
 
             task2 = progress.add_task("Apply Hosttags to objects", total=total)
-            with multiprocessing.Pool() as pool:
+            with create_pool() as pool:
                 tags = manager.list()
-                for entry in db_objects:
+                for entry in Host.iter_hosts(db_objects, views=True):
                     pool.apply_async(self.update_hosts_tags,
                                      args=(entry, tags),
                                      callback=lambda x: progress.advance(task2))
@@ -144,9 +167,10 @@ class CheckmkTagSync(CMK2):
         Update the Tags provided by the Host
         """
         cache_name = 'cmk_tags_tag_choices'
-        if cache_name not in db_host.cache:
+        entry = db_host.cache.get(cache_name)
+        if not isinstance(entry, dict) or 'outcomes' not in entry:
             return
-        hosts_tags = db_host.cache[cache_name]
+        hosts_tags = entry['outcomes']
 
         for group_id, tags in hosts_tags.items():
             tag_id, tag_title = tags
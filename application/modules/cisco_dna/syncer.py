@@ -1,12 +1,13 @@
 """
 Cisco DNA Syncer
 """
-import requests
 from requests.auth import HTTPBasicAuth
 
 from application import app
 from application.models.host import Host
 from application.modules.debug import ColorCodes
+from application.helpers.importer import run_import
+from application.helpers.http import create_session
 
 class CiscoDNA():
     """
@@ -24,6 +25,7 @@ class CiscoDNA():
         self.user = config['username']
         self.password = config['password']
         self.verify = not app.config.get('DISABLE_SSL_ERRORS')
+        self.session = create_session()
 
 #   .-- get_auth_token
     def get_auth_token(self):
@@ -32,7 +34,7 @@ class CiscoDNA():
         """
         print(f"{ColorCodes.OKGREEN} -- {ColorCodes.ENDC}Get Auth Token")
         url = f"{self.address}/dna/system/api/v1/auth/token"
-        response = requests.request(
+        response = self.session.request(
              "POST",
               url,
               auth=HTTPBasicAuth(self.user, self.password),
@@ -122,7 +124,7 @@ class CiscoDNA():
             print(f"{ColorCodes.HEADER}{db_host.hostname}{ColorCodes.ENDC}")
             url = base_url + db_host.sync_id
             #pylint: disable=missing-timeout
-            response = requests.request("GET", url, headers=headers, verify=self.verify)
+            response = self.session.request("GET", url, headers=headers, verify=self.verify)
             response_json = response.json()['response']
             inventory = {}
             for interface in response_json:
@@ -207,16 +209,11 @@ class CiscoDNA():
         url = f"{self.address}/dna/intent/api/v1/network-device?hostname=.*"
         headers = {"x-auth-token": token}
         #pylint: disable=missing-timeout
-        response = requests.request("GET", url, headers=headers, verify=self.verify)
+        response = self.session.request("GET", url, headers=headers, verify=self.verify)
         response_json = response.json()['response']
-        total = len(response_json)
-        counter = 0
-        for device in response_json:
-            counter += 1
-            process = 100.0 * counter / total
-            hostname = device['hostname']
-            print(f"{ColorCodes.HEADER}({process:.0f}%) {hostname}{ColorCodes.ENDC}")
-            db_host = Host.get_host(hostname)
+
+        def update_device(db_host, device):
+            """ Device Information goes to the Inventory """
             inventory = {}
             inventory['manufacturer'] = "cisco"
             for attribute in inventory_attributes:
@@ -224,8 +221,7 @@ class CiscoDNA():
             db_host.update_inventory('cisco_dna_', inventory)
             db_host.sync_id = device['id']
             db_host.set_import_seen()
-            do_save = db_host.set_account(account_dict=self.account_dict)
-            if do_save:
-                db_host.save()
-            else:
-                print("  - Object owned by other Source, not saved")
+
+        run_import(self.account_dict,
+                   ((device['hostname'], device) for device in response_json),
+                   update_func=update_device)
@@ -4,6 +4,7 @@
 Custom Attributes for Host
 """
 from application.modules.rule.rule import Rule
+from application.modules.rule.compiler import RuleDependencies
 
 
 
@@ -14,6 +15,13 @@ class CustomAttributeRule(Rule): # pylint: disable=too-few-public-methods
 
     name = "Custom Attributes"
 
+    def outcome_dependencies(self, outcome):
+        """
+        The Values are set as they are, no Attribute is read
+        """
+        return RuleDependencies()
+
+
     def add_outcomes(self, _rule, rule_outcomes, outcomes):
         """
         Add the new Attributes
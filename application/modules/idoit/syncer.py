@@ -63,7 +63,7 @@ class SyncIdoit(Plugin):
             logger.debug(f"Request Json Body: {data}")
             #pylint: disable=missing-timeout
             if method == 'post':
-                response = requests.post(url, auth=auth, json=data)
+                response = self.session.post(url, auth=auth, json=data)
 
             logger.debug(f"Response Text: {response.text}")
             if response.status_code == 403:
@@ -233,11 +233,11 @@ class SyncIdoit(Plugin):
 
         print(f"\n{CC.OKGREEN} -- {CC.ENDC}Start Sync")
         db_objects = Host.get_export_hosts()
-        total = len(db_objects)
+        total = db_objects.count()
         counter = 0
         found_hosts = []
 
-        for db_host in db_objects:
+        for db_host in Host.iter_hosts(db_objects):
             objectname = db_host.hostname
             counter += 1
             process = 100.0 * counter / total
@@ -43,9 +43,10 @@ class JdiscApplications(JDisc):
         """
         JDisc Application Import
         """
+        applications = []
         for labels in self.run_query()['devices']['findAll']:
-            applications =  labels['operatingSystem']['installedApplications']
-            self.handle_object(applications, 'application')
+            applications += labels['operatingSystem']['installedApplications']
+        self.handle_object(applications, 'application')
 
 
     def inventorize(self):
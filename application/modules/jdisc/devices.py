@@ -5,9 +5,9 @@ Jdisc Device Import
 from application.modules.jdisc.jdisc import JDisc
 
 from syncerapi.v1.inventory import run_inventory
+from syncerapi.v1.importer import run_import
 from syncerapi.v1 import (
     Host,
-    cc,
 )
 
 class JdiscDevices(JDisc):
@@ -131,22 +131,20 @@ class JdiscDevices(JDisc):
         """
         JDisc Import
         """
-        for labels in self.run_query()['devices']['findAll']:
-            if 'name' not in labels:
-                continue
-            hostname = labels['name']
-            if 'rewrite_hostname' in self.config and self.config['rewrite_hostname']:
-                hostname = Host.rewrite_hostname(hostname,
-                                                 self.config['rewrite_hostname'], labels)
-            print(f" {cc.OKGREEN}* {cc.ENDC} Check {hostname}")
-            del labels['name']
-            host_obj = Host.get_host(hostname)
-            host_obj.update_host(labels)
-            do_save=host_obj.set_account(account_dict=self.config)
-            if do_save:
-                host_obj.save()
-            else:
-                print(f" {cc.WARNING} * {cc.ENDC} Managed by diffrent master")
+        def get_devices():
+            """ Hostname and Labels of every Device """
+            for labels in self.run_query()['devices']['findAll']:
+                if 'name' not in labels:
+                    continue
+                hostname = labels['name']
+                if 'rewrite_hostname' in self.config and self.config['rewrite_hostname']:
+                    hostname = Host.rewrite_hostname(hostname,
+                                                     self.config['rewrite_hostname'], labels)
+                del labels['name']
+                yield hostname, labels
+
+        stats = run_import(self.config, get_devices())
+        self.log_details += list(stats.items())
 
     def inventorize(self):
         """
@@ -6,8 +6,6 @@ import click
 
 from syncerapi.v1 import (
     register_cronjob,
-    cc,
-    Host,
 )
 
 from syncerapi.v1.core import (
@@ -17,6 +15,7 @@ from syncerapi.v1.core import (
 
 
 from syncerapi.v1.inventory import run_inventory
+from syncerapi.v1.importer import run_import
 
 class JDisc(Plugin):
     """
@@ -59,20 +58,26 @@ class JDisc(Plugin):
     def handle_object(self, objects, obj_type):
         """
         Handle host actions """
-        for found_obj in objects:
-            found_obj = found_obj[obj_type]
-            if not 'name' in found_obj:
-                continue
-            name = found_obj['name']
-            del found_obj['name']
-            host_obj = Host.get_host(name)
-            do_save = host_obj.set_account(account_dict=self.config)
-            if do_save:
-                host_obj.is_object = True
-                host_obj.object_type = obj_type
-                host_obj.set_labels(found_obj)
-                host_obj.save()
-            print(f" {cc.OKGREEN}* {cc.ENDC} Created object {name}")
+        def get_objects():
+            """ Name and Labels of every Object """
+            for found_obj in objects:
+                found_obj = found_obj[obj_type]
+                if not 'name' in found_obj:
+                    continue
+                name = found_obj['name']
+                del found_obj['name']
+                yield name, found_obj
+
+        def update_object(host_obj, labels):
+            """ Objects get all Labels, and keep their type """
+            host_obj.is_object = True
+            host_obj.object_type = obj_type
+            host_obj.set_labels(labels)
+
+        # The Account sets is_object and object_type too, so it has to run first
+        stats = run_import(self.config, get_objects(), update_func=update_object,
+                           account_first=True)
+        self.log_details += list(stats.items())
 
     #def get_custom_fields_query(self, mode):
     #    """
@@ -113,7 +113,7 @@ class SyncDataFlow(SyncNetbox):
             self.console = progress.console.print
             task1 = progress.add_task("Updating Data in Netbox", total=total)
 
-            for db_object in db_objects:
+            for db_object in Host.iter_hosts(db_objects):
 
                 all_attributes = self.get_host_attributes(db_object, 'netbox_hostattribute')
                 if not all_attributes:
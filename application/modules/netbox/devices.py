@@ -98,7 +98,7 @@ class SyncDevices(SyncNetbox):
                       TimeElapsedColumn()) as progress:
             self.console = progress.console.print
             task1 = progress.add_task("Updating Objects", total=total)
-            for db_host in db_objects:
+            for db_host in Host.iter_hosts(db_objects):
                 try:
                     hostname = db_host.hostname
                     all_attributes = self.get_host_attributes(db_host, 'netbox')
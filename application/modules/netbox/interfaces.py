@@ -48,7 +48,7 @@ class SyncInterfaces(SyncNetbox):
                 current_netbox_interfaces = self.nb.virtualization.interfaces
 
             self.if_types = [x['value'] for x in self.nb.dcim.interfaces.choices()['type']]
-            for db_object in db_objects:
+            for db_object in Host.iter_hosts(db_objects):
                 port_infos = []
                 try:
                     hostname = db_object.hostname
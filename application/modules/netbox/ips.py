@@ -42,7 +42,7 @@ class SyncIPS(SyncNetbox):
                       TimeElapsedColumn()) as progress:
             self.console = progress.console.print
             task1 = progress.add_task("Updating IPs", total=total)
-            for db_object in db_objects:
+            for db_object in Host.iter_hosts(db_objects):
                 ip_infos = []
                 hostname = db_object.hostname
 
@@ -317,7 +317,7 @@ class SyncNetbox(Plugin):
             task1 = progress.add_task(f"Updating Data for {what}", total=total)
 
 
-            for db_object in db_objects:
+            for db_object in Host.iter_hosts(db_objects):
                 hostname = db_object.hostname
                 try:
                     all_attributes = self.get_host_attributes(db_object, 'netbox_hostattribute')
@@ -97,7 +97,7 @@ class SyncVirtualMachines(SyncNetbox):
 
             current_nb_objects = self.nb.virtualization.virtual_machines
             found_hosts = []
-            for db_object in db_objects:
+            for db_object in Host.iter_hosts(db_objects):
                 hostname = db_object.hostname
                 try:
                     all_attributes = self.get_host_attributes(db_object, 'netbox_hostattribute')
@@ -4,6 +4,7 @@ Alle Stuff shared by the plugins
 #pylint: disable=too-few-public-methods
 #pylint: disable=logging-fstring-interpolation
 from datetime import datetime
+import os
 import time
 import atexit
 from mongoengine.errors import DoesNotExist
@@ -17,6 +18,11 @@ from application.modules.custom_attributes.models import CustomAttributeRule as
 from application.modules.custom_attributes.rules import CustomAttributeRule
 
 from application.modules.debug import attribute_table
+from application.helpers.http import create_session, compress_json
+from application.helpers.syncer_jinja import template_cache
+from application.modules.rule.outcome_cache import outcome_cache
+from application.modules.rule.compiler import stats_collector
+from application.modules.rule.profiling import rule_profiler
 
 from syncerapi.v1 import (
     get_account,
@@ -44,6 +50,9 @@ class Plugin():
     dry_run = False
     save_requests = False
 
+    _session = None
+    _session_pid = None
+
     config = None
     log_details = None
 
@@ -73,6 +82,11 @@ class Plugin():
 
         if not self.source:
             self.source = self.__class__.__qualname__.replace('.','')
+        # The run is started by the Command
+        self.run_id = rule_profiler.run_id
+        # The Caches live in the process, the log shows the numbers of this run
+        template_cache.reset_counters()
+        outcome_cache.reset_counters()
 
 
         atexit.register(self.save_log)
@@ -83,16 +97,41 @@ class Plugin():
         """
         duration = time.time() - self.start_time
         self.log_details.append(('duration', duration))
+        cache_info = template_cache.info()
+        if cache_info.hits or cache_info.misses:
+            self.log_details.append(('jinja_cache', f"Hits: {cache_info.hits}, "\
+                                                    f"Misses: {cache_info.misses}, "\
+                                                    f"Size: {cache_info.currsize}"))
+        if outcome_cache.hits or outcome_cache.misses:
+            self.log_details.append(('outcome_cache', f"Hits: {outcome_cache.hits}, "\
+                                                      f"Misses: {outcome_cache.misses}"))
+            outcome_cache.trim()
         self.log_details.append(('ended', datetime.now()))
+        stats_collector.flush()
+        if self.run_id and rule_profiler.enabled():
+            self.log_details.append(('rule_profile', self.run_id))
+            rule_profiler.finish_run(self.run_id, self.name, self.source)
 
         log.log(self.name, source=self.source, details=self.log_details)
 
 
 
-    def inner_request(self, method, url, data=None, headers=None, auth=None):
+    @property
+    def session(self):
+        """
+        HTTP Session of the Plugin, Connections are kept alive.
+        Every Process gets its own Session.
+        """
+        if self._session is None or self._session_pid != os.getpid():
+            self._session = create_session()
+            self._session_pid = os.getpid()
+        return self._session
+
+    def inner_request(self, method, url, data=None, headers=None, auth=None, stream=False):
         """
         Requst Module for all HTTP Requests
-        by Plugin
+        by Plugin.
+        With stream, the Response Body is not loaded, use iter_content()
         """
         logger.debug('\n************ HTTP DEBUG ************')
         logger.debug(f"Request ({method.upper()}) to {url}")
@@ -107,9 +146,14 @@ class Plugin():
             payload['headers'] = headers
         if auth:
             payload['auth'] = auth
+        if stream:
+            payload['stream'] = True
 
         if headers and headers.get('Content-Type') == "application/json" and data:
-            payload['json'] = data
+            if compressed := compress_json(data, headers):
+                payload['data'], payload['headers'] = compressed
+            else:
+                payload['json'] = data
         elif data and method != 'get':
             payload['data'] = data
         elif data:
@@ -129,41 +173,12 @@ class Plugin():
                 return Struct(status_code=200, headers={}, json=json_obj)
 
 
-        #match method:
-        #    case "get":
-        #        resp = requests.get(url, **payload)
-        #    case 'post':
-        #        resp = requests.post(url, **payload)
-        #    case 'patch':
-        #        resp = requests.patch(url, **payload)
-        #    case 'put':
-        #        resp = requests.put(url, **payload)
-        #    case 'delete':
-        #        resp = requests.delete(url, **payload)
-        #    case 'head':
-        #        resp = requests.head(url, **payload)
-        #    case 'options':
-        #        resp = requests.options(url, **payload)
-        # Python pre 3.10 suppport.....:
         max_retries = app.config['HTTP_MAX_RETRIES']
         retry_wait = app.config['HTTP_REPEAT_TIMEOUT']
         resp = {}
         for attempt in range(1, max_retries+1):
             try:
-                if method == "get":
-                    resp = requests.get(url, **payload)
-                elif method == 'post':
-                    resp = requests.post(url, **payload)
-                elif method == 'patch':
-                    resp = requests.patch(url, **payload)
-                elif method == 'put':
-                    resp = requests.put(url, **payload)
-                elif method == 'delete':
-                    resp = requests.delete(url, **payload)
-                elif method ==  'head':
-                    resp = requests.head(url, **payload)
-                elif method ==  'options':
-                    resp = requests.options(url, **payload)
+                resp = self.session.request(method, url, **payload)
                 break
             except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
                 print(f"Try {attempt} of {max_retries} failed: {e}")
@@ -173,6 +188,8 @@ class Plugin():
                 else:
                     raise
 
+        if stream:
+            return resp
         try:
             logger.debug(f"Response Json: {pformat(resp.json())}")
         except requests.exceptions.JSONDecodeError:
@@ -189,6 +206,113 @@ class Plugin():
         self.custom_attributes.rules = \
                         CustomAttributeRuleModel.objects(enabled=True).order_by('sort_field')
 
+    def compile_rules(self):
+        """
+        Compile all Rule sets of the Plugin once per run.
+        Call before the Plugin is passed to worker processes,
+        so that they don't need to compile again for every Host.
+        """
+        if not self.custom_attributes:
+            self.init_custom_attributes()
+        for rule_set in [self.custom_attributes, self.rewrite, self.filter,
+                         getattr(self, 'actions', False)]:
+            if rule_set:
+                rule_set.compile_rules()
+
+
+    def apply_rewrites(self, db_host, attributes):
+        """
+        Add or delete Attributes based on the Rewrite Rules
+        """
+        for rewrite, value in self.rewrite.get_outcomes(db_host, attributes).items():
+            realname = rewrite[4:]
+            if rewrite.startswith('add_'):
+                attributes[realname] = value
+            elif rewrite.startswith('del_'):
+                try:
+                    del attributes[realname]
+                except KeyError:
+                    continue
+
+    def prepare_attributes_batch(self, db_hosts, cache):
+        """
+        Evaluate the Attribute Rule sets for a batch of Hosts at once.
+        Custom Attributes and Rewrites end up in the Host Cache,
+        the Filter Rules are prepared, so that the following
+        get_host_attributes() calls only need to collect the results.
+        Call finish_batch() once done with the Hosts.
+        """
+        rules_version = self.get_attribute_rules_version()
+        pending = []
+        for db_host in db_hosts:
+            if self.has_attribute_cache(db_host, f"{cache}_hostattribute", rules_version):
+                continue
+            attributes = {}
+            attributes.update(db_host.labels.items())
+            attributes.update(db_host.inventory.items())
+            pending.append((db_host, attributes))
+
+        stages = [(self.custom_attributes,
+                   lambda db_host, attributes: \
+                        attributes.update(self.custom_attributes.get_outcomes(db_host, attributes)))]
+        if self.rewrite:
+            stages.append((self.rewrite, self.apply_rewrites))
+        for rule_set, apply_outcomes in stages:
+            rule_set.prepare_batch(pending)
+            next_pending = []
+            for db_host, attributes in pending:
+                try:
+                    apply_outcomes(db_host, attributes)
+                except Exception: # pylint: disable=broad-except
+                    # The error shows up again once the Host is calculated on its own
+                    continue
+                next_pending.append((db_host, attributes))
+            pending = next_pending
+        if self.filter:
+            self.filter.prepare_batch(pending)
+
+    def finish_batch(self):
+        """
+        Forget all batch results of the Rule sets
+        """
+        for rule_set in [self.custom_attributes, self.rewrite, self.filter,
+                         getattr(self, 'actions', False)]:
+            if rule_set:
+                rule_set.finish_batch()
+
+    def get_attribute_rules_version(self):
+        """
+        Combined Version of the Rule sets the Attributes are calculated with
+        """
+        if not self.custom_attributes:
+            self.init_custom_attributes()
+        versions = []
+        for rule_set in [self.custom_attributes, self.rewrite, self.filter]:
+            if rule_set:
+                rule_set.compile_rules()
+                versions.append(rule_set.rules_version)
+            else:
+                versions.append('')
+        return ':'.join(versions)
+
+    def get_cache_names(self, cache):
+        """
+        Names of the Host Cache Entries the Calculation for cache uses
+        """
+        names = {f"{cache}_hostattribute"}
+        for rule_set in [self.custom_attributes, self.rewrite, self.filter,
+                         getattr(self, 'actions', False)]:
+            if rule_set:
+                names.add(rule_set.get_cache_name())
+        return names
+
+    @staticmethod
+    def has_attribute_cache(db_host, cache, rules_version):
+        """
+        Check if the Attribute Cache of the Host is valid for the current Rules
+        """
+        entry = db_host.cache.get(cache, {})
+        return 'attributes' in entry and entry.get('rules_version') == rules_version
 
     def get_host_attributes(self, db_host, cache):
         """
@@ -198,34 +322,28 @@ class Plugin():
 
     def get_attributes(self, db_host, cache):
         """
-        Return Host Attributes or False if Host should be ignored
+        Return Host Attributes or False if Host should be ignored.
+        db_host can be a Host, or a HostView/HostSnapshot
         """
         # Get Attributes
         cache += "_hostattribute"
-        db_host.cache.setdefault(cache, {})
-        if 'attributes' in db_host.cache[cache]:
+        rules_version = self.get_attribute_rules_version()
+        if self.has_attribute_cache(db_host, cache, rules_version):
             logger.debug(f"Using Attribute Cache for {db_host.hostname}")
             if 'ignore_host' in db_host.cache[cache]['attributes']['filtered']:
                 return False
             return db_host.cache[cache]['attributes']
+        # Rule changes make the old entry invalid
+        db_host.cache[cache] = {'rules_version': rules_version}
         attributes = {}
         attributes.update(db_host.labels.items())
         attributes.update(db_host.inventory.items())
 
-        self.init_custom_attributes()
         attributes.update(self.custom_attributes.get_outcomes(db_host, attributes))
 
         attributes_filtered = {}
         if self.rewrite:
-            for rewrite, value in self.rewrite.get_outcomes(db_host, attributes).items():
-                realname = rewrite[4:]
-                if rewrite.startswith('add_'):
-                    attributes[realname] = value
-                elif rewrite.startswith('del_'):
-                    try:
-                        del attributes[realname]
-                    except KeyError:
-                        continue
+            self.apply_rewrites(db_host, attributes)
         data = {
             'all': attributes,
             'filtered': attributes_filtered,
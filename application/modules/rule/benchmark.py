@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the Rule Engine with synthetic Hosts and Rules
+"""
+import json
+import random
+import resource
+import platform
+from time import perf_counter
+from datetime import datetime
+from bson import ObjectId
+
+from application import app, VERSION
+from application.modules.plugin import Plugin
+from application.modules.rule.models import condition_types, FullCondition, \
+                                           FilterAction, AttributeRewriteAction, CustomAttribute
+from application.modules.rule.filter import Filter
+from application.modules.rule.rewrite import Rewrite
+from application.modules.custom_attributes.models import CustomAttributeRule as \
+        CustomAttributeRuleModel
+from application.modules.custom_attributes.rules import CustomAttributeRule
+from application.modules.checkmk.models import CheckmkRule as CheckmkRuleModel, \
+                                               CheckmkFilterRule, CheckmkRewriteAttributeRule, \
+                                               CheckmkRuleOutcome
+from application.modules.checkmk.rules import CheckmkRule
+
+VALUES = [f"value_{x}" for x in range(10)] + ['true', 'false']
+
+class BenchmarkHost():
+    """
+    Host Object which lives only in Memory.
+    Has everything the Rules need from a Host, but is never saved.
+    """
+    def __init__(self, hostname, labels, inventory):
+        """
+        Init
+        """
+        self.hostname = hostname
+        self.labels = labels
+        self.inventory = inventory
+        self.cache = {}
+        self.folder = None
+
+    def save(self):
+        """
+        Nothing to save
+        """
+
+    def get_folder(self):
+        """ Returns Folder if System is locked to one, else False """
+        return self.folder or False
+
+    def lock_to_folder(self, folder_name):
+        """
+        Lock System to given Folder
+        """
+        self.folder = folder_name or None
+
+
+def make_hosts(rand, count, num_labels, num_inventory):
+    """
+    Synthetic Hosts with the given number of Labels and Inventory Attributes
+    """
+    hosts = []
+    for idx in range(count):
+        labels = {f"label_{x}": rand.choice(VALUES) for x in range(num_labels)}
+        inventory = {f"inv__item_{x}": rand.choice(VALUES) for x in range(num_inventory)}
+        hosts.append(BenchmarkHost(f"{rand.choice(['srv', 'web', 'db'])}{idx:06d}.example.com",
+                                   labels, inventory))
+    return hosts
+
+
+def make_condition(rand, idx, num_labels):
+    """
+    Condition, every condition type is used in turn
+    """
+    match = condition_types[idx % len(condition_types)][0]
+    needle = {
+        'equal': rand.choice(VALUES),
+        'in': "value_",
+        'not_in': "value_9",
+        'in_list': ", ".join(rand.sample(VALUES, 3)),
+        'ewith': f"_{rand.randint(0, 9)}",
+        'swith': "value",
+        'regex': "value_[0-4]",
+        'bool': rand.choice(['True', 'False']),
+        'ignore': "",
+    }[match]
+    if idx % 7 == 0:
+        return FullCondition(match_type='host', hostname_match=match,
+                             hostname=needle if match != 'in' else "srv",
+                             hostname_match_negate=idx % 5 == 0)
+    # Name Matches are mostly exact, like in most setups
+    tag_match = 'equal' if idx % 3 else match
+    tag = f"label_{rand.randint(0, max(num_labels - 1, 0))}"
+    if tag_match in ['in', 'swith', 'regex']:
+        tag = "label_"
+    elif tag_match == 'ewith':
+        tag = tag[-2:]
+    elif tag_match == 'in_list':
+        tag = f"{tag}, label_0"
+    return FullCondition(match_type='tag', tag_match=tag_match, tag=tag,
+                         tag_match_negate=tag_match == 'ignore' and idx % 11 == 0,
+                         value_match=match, value=needle,
+                         value_match_negate=idx % 5 == 0)
+
+
+def make_rules(rand, model, count, num_labels, outcome_factory):
+    """
+    Rule Documents, they are never saved
+    """
+    rules = []
+    for idx in range(count):
+        rule = model(name=f"benchmark_{idx}",
+                     condition_typ=['all', 'any', 'anyway'][idx % 3] if idx % 10 else 'anyway',
+                     conditions=[make_condition(rand, idx * 3 + x, num_labels) \
+                                    for x in range(rand.randint(1, 3))],
+                     outcomes=[outcome_factory(rand, idx)],
+                     last_match=False, enabled=True, sort_field=idx)
+        rule.id = ObjectId()
+        rules.append(rule)
+    return rules
+
+
+def custom_attribute_outcome(rand, idx):
+    """ Outcome of a Custom Attribute Rule """
+    return CustomAttribute(attribute_name=f"custom_{idx}",
+                           attribute_value=rand.choice(['true', 'false', 'custom_value']))
+
+
+def rewrite_outcome(rand, idx):
+    """ Outcome of a Rewrite Rule """
+    return AttributeRewriteAction(old_attribute_name=f"label_{idx % 5}",
+                                  overwrite_name=rand.choice(['', 'string', 'jinja']),
+                                  new_attribute_name="rewritten_{{label_1}}",
+                                  overwrite_value=rand.choice(['', 'string', 'jinja']),
+                                  new_value="{{label_2}}-{{HOSTNAME}}")
+
+
+def filter_outcome(rand, idx):
+    """ Outcome of a Filter Rule """
+    action = 'whitelist_attribute'
+    if idx % 25 == 24:
+        action = 'ignore_hosts'
+    return FilterAction(action=action,
+                        attribute_name=rand.choice(["label_*", "inv__*", f"label_{idx % 5}",
+                                                    f"custom_{idx}"]))
+
+
+def checkmk_outcome(rand, idx):
+    """ Outcome of a Checkmk Rule """
+    action, param = rand.choice([
+        ('move_folder', "/{{label_0}}/{{label_1}}"),
+        ('custom_attribute', "tag_benchmark:{{label_2}}"),
+        ('attribute', "label_3"),
+        ('set_parent', "{{label_4}}"),
+        ('create_cluster', "inv__item_*"),
+        ('dont_update_prefixed_labels', f"prefix_{idx}"),
+    ])
+    return CheckmkRuleOutcome(action=action, action_param=param)
+
+
+def percentile(sorted_values, percent):
+    """
+    Value at percent of a sorted list
+    """
+    if not sorted_values:
+        return 0
+    return sorted_values[int(round(percent / 100 * (len(sorted_values) - 1)))]
+
+
+def timed(method, totals, name):
+    """
+    Wrap method to count its time in totals[name]
+    """
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            totals[name] += perf_counter() - start
+    return wrapper
+
+
+def run_benchmark(num_hosts, num_rules, num_labels, num_inventory,
+                  seed=1, shared_cache=False):
+    """
+    Calculate Attributes and Checkmk Rules for synthetic Hosts,
+    returns dict with the results
+    """
+    # pylint: disable=too-many-arguments, too-many-locals
+    rand = random.Random(seed)
+    hosts = make_hosts(rand, num_hosts, num_labels, num_inventory)
+
+    plugin = Plugin()
+    plugin.name = "Rule Benchmark"
+    plugin.source = "rule_benchmark"
+    plugin.custom_attributes = CustomAttributeRule()
+    plugin.custom_attributes.rules = make_rules(rand, CustomAttributeRuleModel, num_rules,
+                                                num_labels, custom_attribute_outcome)
+    plugin.rewrite = Rewrite()
+    plugin.rewrite.rules = make_rules(rand, CheckmkRewriteAttributeRule, num_rules,
+                                      num_labels, rewrite_outcome)
+    plugin.filter = Filter()
+    plugin.filter.rules = make_rules(rand, CheckmkFilterRule, num_rules,
+                                     num_labels, filter_outcome)
+    actions = CheckmkRule()
+    actions.rules = make_rules(rand, CheckmkRuleModel, num_rules, num_labels, checkmk_outcome)
+
+    totals = {}
+    for name, rule_set in [('CustomAttributeRule', plugin.custom_attributes),
+                           ('Rewrite', plugin.rewrite),
+                           ('Filter', plugin.filter),
+                           ('CheckmkRule', actions)]:
+        totals[name] = 0.0
+        rule_set.get_outcomes = timed(rule_set.get_outcomes, totals, name)
+
+    # Neither Statistics nor shared Outcomes of synthetic Rules
+    # should end up in the database
+    saved_config = {x: app.config[x] for x in ['RULE_STATS_SAMPLE_RATE',
+                                               'RULE_OUTCOME_CACHE_SIZE']}
+    app.config['RULE_STATS_SAMPLE_RATE'] = 0
+    if not shared_cache:
+        app.config['RULE_OUTCOME_CACHE_SIZE'] = 0
+    try:
+        start = perf_counter()
+        plugin.compile_rules()
+        actions.compile_rules()
+        compile_time = perf_counter() - start
+
+        latencies = []
+        ignored = 0
+        errors = 0
+        start = perf_counter()
+        for db_host in hosts:
+            host_start = perf_counter()
+            try:
+                attributes = plugin.get_attributes(db_host, 'benchmark')
+                if attributes:
+                    actions.get_outcomes(db_host, attributes['all'])
+                else:
+                    ignored += 1
+            except Exception: # pylint: disable=broad-except
+                errors += 1
+            latencies.append(perf_counter() - host_start)
+        duration = perf_counter() - start
+    finally:
+        app.config.update(saved_config)
+
+    latencies.sort()
+    result = {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'date': datetime.now().isoformat(),
+        'parameters': {
+            'hosts': num_hosts,
+            'rules': num_rules,
+            'labels': num_labels,
+            'inventory': num_inventory,
+            'seed': seed,
+            'shared_cache': shared_cache,
+        },
+        'compile_seconds': compile_time,
+        'duration_seconds': duration,
+        'hosts_per_second': num_hosts / duration if duration else 0,
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': latencies[-1] * 1000 if latencies else 0,
+        },
+        'rule_sets_seconds': totals,
+        'ignored_hosts': ignored,
+        'failed_hosts': errors,
+        # Peak resident size of the whole process, including the Application itself.
+        # Not measured with tracemalloc, since it would slow down the Benchmark.
+        # Linux reports it in KiB
+        'process_peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    return result
+
+
+def write_result(result, path):
+    """
+    Save result as JSON
+    """
+    with open(path, 'w', encoding='utf-8') as result_file:
+        json.dump(result, result_file, indent=2)
@@ -0,0 +1,769 @@
+#!/usr/bin/env python3
+"""
+Compile Rules into a ready to run form
+"""
+# pylint: disable=logging-fstring-interpolation, too-few-public-methods
+import os
+import json
+import random
+import hashlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from multiprocessing import util
+from time import perf_counter_ns
+from bisect import bisect_left
+from pymongo import UpdateOne
+from application import logger, app
+from application.modules.rule.match import Matcher
+from application.modules.rule.models import RuleConditionStats
+from application.helpers.syncer_jinja import template_variables
+
+# Flush collected Statistics after this number of sampled Conditions
+STATS_FLUSH_SAMPLES = 500
+
+
+def _search_key(key):
+    """
+    Form of the Attribute Name as seen by the start- and endswith matches
+    """
+    if isinstance(key, str):
+        return key.lower()
+    return str(key)
+
+class AttributeIndex():
+    """
+    Lookup structures for the Attribute Names of one Host.
+    Everything is build lazy, only once it is needed by a Condition,
+    and only once per Host evaluation.
+    """
+    __slots__ = ('attributes', 'hostname', '_by_name', '_prefixes', '_suffixes')
+
+    def __init__(self, attributes, hostname):
+        """
+        Hostname needs to be passed lowercase
+        """
+        self.attributes = attributes
+        self.hostname = hostname
+        self._by_name = None
+        self._prefixes = None
+        self._suffixes = None
+
+    def _names(self):
+        """
+        Map of lowercase Name to the Attribute Names
+        """
+        if self._by_name is None:
+            self._by_name = {}
+            for key in self.attributes:
+                self._by_name.setdefault(_search_key(key), []).append(key)
+        return self._by_name
+
+    def equal(self, needle):
+        """
+        Attribute Names matching needle in the same way as the 'equal' condition
+        """
+        found = self._names().get(needle, [])
+        # Non-string names are never equal to the string needle
+        return [x for x in found if isinstance(x, str)]
+
+    @staticmethod
+    def _range(sorted_keys, needle):
+        """
+        All entries of sorted list starting with needle
+        """
+        idx = bisect_left(sorted_keys, needle)
+        found = []
+        while idx < len(sorted_keys) and sorted_keys[idx].startswith(needle):
+            found.append(sorted_keys[idx])
+            idx += 1
+        return found
+
+    def startswith(self, needle):
+        """
+        Attribute Names starting with needle
+        """
+        if self._prefixes is None:
+            self._prefixes = sorted(self._names())
+        names = self._names()
+        return [key for found in self._range(self._prefixes, needle) for key in names[found]]
+
+    def endswith(self, needle):
+        """
+        Attribute Names ending with needle
+        """
+        if self._suffixes is None:
+            self._suffixes = sorted(x[::-1] for x in self._names())
+        names = self._names()
+        return [key for found in self._range(self._suffixes, needle[::-1]) \
+                    for key in names[found[::-1]]]
+
+
+def condition_key(condition):
+    """
+    Stable Hash of the Condition Content
+    """
+    content = json.dumps(condition, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def iter_bits(bits):
+    """
+    Positions of all set Bits, lowest first
+    """
+    text = bin(bits)[:1:-1]
+    pos = text.find('1')
+    while pos != -1:
+        yield pos
+        pos = text.find('1', pos + 1)
+
+
+class BitmapBuilder():
+    """
+    Collect Host positions and return them as int Bitmap
+    """
+    __slots__ = ('mask',)
+
+    def __init__(self, size):
+        """
+        Size is the number of Hosts
+        """
+        self.mask = bytearray((size + 7) // 8)
+
+    def add(self, positions):
+        """
+        Set the Bits of all given positions
+        """
+        mask = self.mask
+        for pos in positions:
+            mask[pos >> 3] |= 1 << (pos & 7)
+
+    def bitmap(self):
+        """
+        Bitmap as int, Bit n stands for Host n
+        """
+        return int.from_bytes(self.mask, 'little')
+
+
+class HostColumns():
+    """
+    Columnar View of the Attributes of many Hosts.
+    Every Attribute Name has its distinct Values,
+    each together with the positions of the Hosts having it.
+    """
+    __slots__ = ('hostnames', 'size', 'all_hosts', 'columns', 'unhashable', 'index', '_presence')
+
+    def __init__(self, entries):
+        """
+        Entries are tuples of lowercase Hostname and Attributes
+        """
+        self.hostnames = []
+        self.columns = {}
+        self.unhashable = {}
+        self._presence = {}
+        for pos, (hostname, attributes) in enumerate(entries):
+            self.hostnames.append(hostname)
+            for name, value in attributes.items():
+                column = self.columns.setdefault(name, {})
+                try:
+                    # The Type is part of the key, since True == 1
+                    entry = column.get((type(value), value))
+                    if entry is None:
+                        column[(type(value), value)] = entry = (value, [])
+                except TypeError:
+                    self.unhashable.setdefault(name, []).append((pos, value))
+                    continue
+                entry[1].append(pos)
+        self.size = len(self.hostnames)
+        self.all_hosts = (1 << self.size) - 1
+        # Lookup of the Attribute Names, same as for single Hosts
+        self.index = AttributeIndex(self.columns, None)
+
+    def values(self, name):
+        """
+        Tuples of Value and Host positions for Attribute Name
+        """
+        for value, positions in self.columns[name].values():
+            yield value, positions
+        for pos, value in self.unhashable.get(name, []):
+            yield value, [pos]
+
+    def presence(self, name):
+        """
+        Bitmap of the Hosts having the Attribute
+        """
+        if name not in self._presence:
+            builder = BitmapBuilder(self.size)
+            if name in self.columns:
+                for _value, positions in self.values(name):
+                    builder.add(positions)
+            self._presence[name] = builder.bitmap()
+        return self._presence[name]
+
+
+class Condition(ABC):
+    """
+    Base for compiled Conditions
+    """
+    __slots__ = ('key', 'position', 'stats')
+
+    def __init__(self, condition, position):
+        """
+        Position is the place of the condition in the Rule as entered
+        """
+        self.key = condition_key(condition)
+        self.position = position
+        # Persisted Statistics: (evaluations, hits, cost_ns)
+        self.stats = None
+
+    @abstractmethod
+    def __call__(self, index):
+        """
+        True if the Condition matches the Host of the AttributeIndex
+        """
+
+    @abstractmethod
+    def evaluate_batch(self, columns):
+        """
+        Return Bitmap of matching Hosts and Bitmap of Hosts with Errors
+        """
+
+    def hit_rate(self):
+        """
+        Share of evaluations where the condition matched
+        """
+        evaluations, hits, _cost = self.stats
+        return hits / evaluations
+
+    def cost(self):
+        """
+        Average cost of an evaluation in nanoseconds
+        """
+        evaluations, _hits, cost = self.stats
+        return cost / evaluations
+
+    def describe(self):
+        """
+        Short Text for the Debug Output
+        """
+        if not self.stats or not self.stats[0]:
+            return f"#{self.position}: no stats"
+        return f"#{self.position}: {self.cost()/1000:.1f}us, {self.hit_rate()*100:.0f}% hit"
+
+
+class HostnameCondition(Condition):
+    """
+    Condition matching the Hostname
+    """
+    __slots__ = ('matcher',)
+
+    def __init__(self, condition, position):
+        """
+        Prepare Matcher
+        """
+        super().__init__(condition, position)
+        self.matcher = Matcher(str(condition['hostname']).lower(),
+                               condition['hostname_match'].lower(),
+                               condition.get('hostname_match_negate'))
+
+    def __call__(self, index):
+        """
+        Check the Hostname of the AttributeIndex
+        """
+        return self.matcher(index.hostname)
+
+    def evaluate_batch(self, columns):
+        """
+        Check all Hostnames
+        """
+        found = BitmapBuilder(columns.size)
+        errors = BitmapBuilder(columns.size)
+        for pos, hostname in enumerate(columns.hostnames):
+            try:
+                if self.matcher(hostname):
+                    found.add([pos])
+            except Exception: # pylint: disable=broad-except
+                errors.add([pos])
+        return found.bitmap(), errors.bitmap()
+
+
+class AttributeCondition(Condition):
+    """
+    Condition matching an Attribute Name together with its Value
+    """
+    __slots__ = ('tag', 'tag_matcher', 'value_matcher', 'only_missing', 'debug', 'lookup')
+
+    def __init__(self, condition, position):
+        """
+        Prepare Matchers
+        """
+        super().__init__(condition, position)
+        self.tag = condition['tag']
+        tag_match = condition['tag_match']
+        tag_match_negate = condition.get('tag_match_negate')
+        # This Case Checks that Tag NOT Exists
+        self.only_missing = tag_match == 'ignore' and bool(tag_match_negate)
+        self.tag_matcher = Matcher(self.tag, tag_match, tag_match_negate)
+        self.value_matcher = Matcher(condition['value'], condition['value_match'],
+                                     condition.get('value_match_negate'))
+        self.debug = app.config['ADVANCED_RULE_DEBUG']
+
+        # Not negated Name Matches can be answered by the AttributeIndex,
+        # all others need to check every Attribute.
+        # The Scan is also used to get the full Debug Output
+        self.lookup = None
+        if not self.debug and not self.tag_matcher.negate \
+                and self.tag_matcher.check is not None:
+            if tag_match in ['equal', 'swith', 'ewith', 'in_list']:
+                self.lookup = tag_match
+
+    def _candidates(self, index):
+        """
+        Attribute Names which match the Tag Condition
+        """
+        needle = self.tag_matcher.needle
+        if self.lookup == 'equal':
+            return index.equal(needle)
+        if self.lookup == 'swith':
+            return index.startswith(needle)
+        if self.lookup == 'ewith':
+            return index.endswith(needle)
+        return [key for entry in needle for key in index.equal(entry)]
+
+    def __call__(self, index):
+        """
+        Check if one of the given attributes match
+        """
+        attributes = index.attributes
+        if self.only_missing:
+            return self.tag not in attributes
+        if self.lookup:
+            value_matcher = self.value_matcher
+            for tag in self._candidates(index):
+                if value_matcher(attributes[tag]):
+                    return True
+            return False
+        return self._scan(attributes)
+
+    def evaluate_batch(self, columns):
+        """
+        Check the Values of all matching Attribute Names at once
+        """
+        if self.only_missing:
+            return columns.all_hosts & ~columns.presence(self.tag), 0
+        if self.lookup:
+            names = self._candidates(columns.index)
+        else:
+            names = [x for x in columns.columns if self.tag_matcher(x)]
+        found = BitmapBuilder(columns.size)
+        errors = BitmapBuilder(columns.size)
+        value_matcher = self.value_matcher
+        for name in names:
+            for value, positions in columns.values(name):
+                try:
+                    if value_matcher(value):
+                        found.add(positions)
+                except Exception: # pylint: disable=broad-except
+                    errors.add(positions)
+        return found.bitmap(), errors.bitmap()
+
+    def _scan(self, attributes):
+        """
+        Check every Attribute against the Tag Condition
+        """
+        tag_matcher = self.tag_matcher
+        value_matcher = self.value_matcher
+        for tag, value in attributes.items():
+            if self.debug:
+                logger.debug(f"Check Tag: {tag} vs needed: {tag_matcher.raw_needle} "\
+                             f"for {tag_matcher.condition}, Negate: {tag_matcher.negate}")
+            if tag_matcher(tag):
+                if self.debug:
+                    logger.debug('--> HIT')
+                    logger.debug(f"Check Value: {repr(value)} vs needed: "\
+                                 f"{repr(value_matcher.raw_needle)} "\
+                                 f"for {value_matcher.condition}, "\
+                                 f"Negate: {value_matcher.negate}")
+                if value_matcher(value):
+                    if self.debug:
+                        logger.debug('--> HIT')
+                    return True
+        return False
+
+
+class StatsCollector():
+    """
+    Collects sampled Condition Statistics of this process
+    and adds them to the persisted ones
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.pending = {}
+        self.samples = 0
+        self.pid = os.getpid()
+
+    def add(self, rule_id, condition, hit, cost_ns):
+        """
+        Add a single sampled evaluation
+        """
+        if os.getpid() != self.pid:
+            # Worker processes never save the Plugin log,
+            # so they flush once they exit
+            self.pid = os.getpid()
+            self.pending = {}
+            self.samples = 0
+            util.Finalize(self, self.flush, exitpriority=10)
+        entry = self.pending.setdefault((rule_id, condition.key), [0, 0, 0])
+        entry[0] += 1
+        entry[1] += int(hit)
+        entry[2] += cost_ns
+        self.samples += 1
+        if self.samples >= STATS_FLUSH_SAMPLES:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the pending Statistics to the Database, with one bulk write
+        """
+        pending, self.pending = self.pending, {}
+        self.samples = 0
+        if not pending:
+            return
+        now = datetime.now()
+        operations = []
+        for (rule_id, key), (evaluations, hits, cost_ns) in pending.items():
+            operations.append(UpdateOne({'rule_id': rule_id, 'condition_key': key},
+                                        {'$inc': {'evaluations': evaluations,
+                                                  'hits': hits,
+                                                  'cost_ns': cost_ns},
+                                         '$set': {'last_update': now}},
+                                        upsert=True))
+        collection = RuleConditionStats._get_collection() # pylint: disable=protected-access
+        collection.bulk_write(operations, ordered=False)
+
+
+stats_collector = StatsCollector()
+
+
+class CompiledRule():
+    """
+    Rule with all Conditions prepared for evaluation
+    """
+    __slots__ = ('rule', 'rule_id', 'name', 'condition_typ',
+                 'conditions', 'outcomes', 'last_match')
+
+    def __init__(self, rule):
+        """
+        Compile given Rule Document
+        """
+        self.rule = rule.to_mongo()
+        self.rule_id = str(self.rule['_id'])
+        self.name = self.rule['name']
+        self.condition_typ = self.rule['condition_typ']
+        self.last_match = self.rule.get('last_match', False)
+        self.outcomes = list(self.rule.get('outcomes', []))
+        self.conditions = []
+        if self.condition_typ in ['any', 'all']:
+            for position, condition in enumerate(self.rule.get('conditions', [])):
+                if condition['match_type'] == 'tag':
+                    self.conditions.append(AttributeCondition(condition, position))
+                else:
+                    self.conditions.append(HostnameCondition(condition, position))
+
+    def order_conditions(self, min_samples):
+        """
+        Reorder the Conditions by their Statistics, so that
+        the evaluation can stop as early as possible.
+        For 'all', cheap conditions likely to fail go first,
+        for 'any', cheap conditions likely to match.
+        The result of the Rule is not changed by the order.
+        Nothing is changed as long as a Condition has not enough samples.
+        """
+        if self.condition_typ not in ['any', 'all'] or len(self.conditions) < 2:
+            return
+        for condition in self.conditions:
+            if not condition.stats or condition.stats[0] < min_samples:
+                return
+
+        def _score(condition):
+            if self.condition_typ == 'all':
+                chance = 1 - condition.hit_rate()
+            else:
+                chance = condition.hit_rate()
+            # Conditions which never stop the evaluation go last
+            return condition.cost() / max(chance, 0.001)
+
+        # Sort is stable, so equal conditions stay in the entered order
+        self.conditions.sort(key=_score)
+
+    def matches(self, index):
+        """
+        Check if the Rule matches the Host of the AttributeIndex
+        """
+        if self.condition_typ == 'anyway':
+            return True
+        if self.condition_typ == 'any':
+            for condition in self.conditions:
+                if condition(index):
+                    return True
+            return False
+        if self.condition_typ == 'all':
+            for condition in self.conditions:
+                if not condition(index):
+                    return False
+            return True
+        return False
+
+    def evaluate_batch(self, columns):
+        """
+        Bitmap of all Hosts matching the Rule, and of the Hosts
+        where a Condition failed before the result was clear
+        """
+        if self.condition_typ == 'anyway':
+            return columns.all_hosts, 0
+        if self.condition_typ not in ['any', 'all']:
+            return 0, 0
+        errors = 0
+        if self.condition_typ == 'all':
+            found = columns.all_hosts
+            for condition in self.conditions:
+                if not found:
+                    break
+                hits, failed = condition.evaluate_batch(columns)
+                # Like in matches(), only Hosts still open reach this condition
+                errors |= failed & found
+                found &= hits
+            return found, errors
+
+        found = 0
+        for condition in self.conditions:
+            open_hosts = columns.all_hosts & ~found
+            if not open_hosts:
+                break
+            hits, failed = condition.evaluate_batch(columns)
+            errors |= failed & open_hosts
+            found |= hits
+        return found, errors
+
+    def matches_sampled(self, index):
+        """
+        Like matches(), but measures every Condition for the Statistics.
+        Conditions after the decision are only evaluated for the Statistics,
+        Errors of them are ignored.
+        """
+        if self.condition_typ not in ['any', 'all']:
+            return self.matches(index)
+        result = None
+        for condition in self.conditions:
+            start = perf_counter_ns()
+            try:
+                hit = condition(index)
+            except Exception: # pylint: disable=broad-except
+                if result is None:
+                    raise
+                continue
+            stats_collector.add(self.rule_id, condition, hit, perf_counter_ns() - start)
+            if result is None:
+                if self.condition_typ == 'any' and hit:
+                    result = True
+                elif self.condition_typ == 'all' and not hit:
+                    result = False
+        if result is None:
+            result = self.condition_typ == 'all'
+        return result
+
+    def describe_conditions(self):
+        """
+        Conditions with Statistics in the current evaluation order
+        """
+        return ", ".join(x.describe() for x in self.conditions)
+
+
+def load_stats(compiled_rules):
+    """
+    Attach the persisted Statistics to the compiled Conditions
+    """
+    rule_ids = [x.rule_id for x in compiled_rules if x.conditions]
+    if not rule_ids:
+        return
+    found = {}
+    for entry in RuleConditionStats.objects(rule_id__in=rule_ids):
+        found[(entry.rule_id, entry.condition_key)] = \
+                (entry.evaluations, entry.hits, entry.cost_ns)
+    for rule in compiled_rules:
+        for condition in rule.conditions:
+            condition.stats = found.get((rule.rule_id, condition.key))
+
+
+def compile_rules(rules):
+    """
+    Compile a Set of Rules Documents.
+    Order of the Rules is kept, the Conditions inside a Rule
+    are ordered by their collected Statistics.
+    """
+    compiled = [CompiledRule(rule) for rule in rules]
+    if app.config['RULE_STATS_SAMPLE_RATE']:
+        load_stats(compiled)
+        for rule in compiled:
+            rule.order_conditions(app.config['RULE_STATS_MIN_SAMPLES'])
+    return compiled
+
+
+def rule_set_version(compiled_rules):
+    """
+    Hash over the Content of all Rules, changes with every Rule edit
+    """
+    content = json.dumps([rule.rule for rule in compiled_rules], sort_keys=True, default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class RuleDependencies():
+    """
+    Attribute Names, and if the Hostname, a Rule set depends on
+    """
+    __slots__ = ('names', 'prefixes', 'matchers', 'all_names', 'hostname', '_covered')
+
+    def __init__(self):
+        """
+        Init without any dependencies
+        """
+        self.names = set()
+        self.prefixes = set()
+        self.matchers = []
+        self.all_names = False
+        self.hostname = False
+        self._covered = {}
+
+    def add_templates(self, values):
+        """
+        Add the Variables used in the Jinja Templates of the values
+        """
+        for value in values:
+            if isinstance(value, (list, tuple)):
+                self.add_templates(value)
+                continue
+            if not isinstance(value, str):
+                continue
+            variables = template_variables(value)
+            if variables is None:
+                # Unknown what the Template needs
+                self.all_names = True
+                self.hostname = True
+                continue
+            if 'HOSTNAME' in variables:
+                self.hostname = True
+            self.names.update(variables)
+
+    def update(self, other):
+        """
+        Merge the other dependencies into this ones
+        """
+        self.names.update(other.names)
+        self.prefixes.update(other.prefixes)
+        self.matchers += other.matchers
+        self.all_names = self.all_names or other.all_names
+        self.hostname = self.hostname or other.hostname
+        self._covered = {}
+
+    def covers(self, name):
+        """
+        True if Attribute Name is one of the dependencies
+        """
+        if self.all_names or name in self.names:
+            return True
+        # The same Names show up on most Hosts, so the Matchers run once per Name
+        if name not in self._covered:
+            self._covered[name] = self._match_name(name)
+        return self._covered[name]
+
+    def _match_name(self, name):
+        """
+        Check Name against the Prefixes and Name Matchers
+        """
+        if self.prefixes and isinstance(name, str) and name.startswith(tuple(self.prefixes)):
+            return True
+        for matcher in self.matchers:
+            try:
+                if matcher(name):
+                    return True
+            except Exception: # pylint: disable=broad-except
+                return True
+        return False
+
+    def select(self, attributes):
+        """
+        Part of the Attributes the Rule set depends on
+        """
+        if self.all_names:
+            return attributes
+        return {key: value for key, value in attributes.items() if self.covers(key)}
+
+
+def collect_dependencies(compiled_rules, outcome_dependencies):
+    """
+    Dependencies of the Conditions of all Rules and of their Outcomes.
+    outcome_dependencies is a function returning the
+    RuleDependencies for a single Outcome.
+    """
+    dependencies = RuleDependencies()
+    for rule in compiled_rules:
+        for condition in rule.conditions:
+            if isinstance(condition, HostnameCondition):
+                dependencies.hostname = True
+            elif condition.only_missing:
+                dependencies.names.add(condition.tag)
+            else:
+                # Each Attribute the Name Condition matches is read
+                dependencies.matchers.append(condition.tag_matcher)
+        for outcome in rule.outcomes:
+            dependencies.update(outcome_dependencies(dict(outcome)))
+    return dependencies
+
+
+def evaluate_batch(compiled_rules, entries, on_rule=None):
+    """
+    Evaluate the Rules for many Hosts at once.
+    Each Condition is checked once over all Hosts, the Rule hits
+    are combined as Bitmaps, and last_match is a mask of finished Hosts.
+
+    Entries are tuples of Hostname and Attributes.
+    Returns dict of Hostname with the list of matching Rules, in order.
+    Hosts where a Condition raised an error are missing in the result,
+    so that they can be checked the normal way.
+    on_rule is called with each Rule, the number of Hosts
+    it was evaluated for and the time it took.
+    """
+    columns = HostColumns([(hostname.lower(), attributes) for hostname, attributes in entries])
+    done = 0
+    errors = 0
+    rule_hits = []
+    for rule in compiled_rules:
+        started = perf_counter_ns()
+        found, failed = rule.evaluate_batch(columns)
+        if on_rule:
+            on_rule(rule, bin(columns.all_hosts & ~done).count('1'), perf_counter_ns() - started)
+        found &= ~done
+        errors |= failed & ~done
+        if rule.last_match:
+            done |= found
+        rule_hits.append((rule, found))
+
+    results = {}
+    for pos, (hostname, _attributes) in enumerate(entries):
+        if not errors >> pos & 1:
+            results[hostname] = []
+    hostnames = [x[0] for x in entries]
+    for rule, found in rule_hits:
+        for pos in iter_bits(found & ~errors):
+            results[hostnames[pos]].append(rule)
+    return results
+
+
+def take_sample():
+    """
+    Decide if the current Host evaluation is used for the Statistics
+    """
+    rate = app.config['RULE_STATS_SAMPLE_RATE']
+    return bool(rate) and random.random() * rate < 1
@@ -3,6 +3,7 @@
 Filter
 """
 from application.modules.rule.rule import Rule
+from application.modules.rule.compiler import RuleDependencies
 
 class Filter(Rule):# pylint: disable=too-few-public-methods
     """
@@ -11,6 +12,22 @@ class Filter(Rule):# pylint: disable=too-few-public-methods
 
     name = "Filter"
 
+    def outcome_dependencies(self, outcome):
+        """
+        Whitelisted Attributes, all of them if searched by Value
+        """
+        dependencies = RuleDependencies()
+        if outcome['action'] == 'whitelist_attribute':
+            attribute_name = outcome['attribute_name']
+            if attribute_name.endswith('*'):
+                dependencies.prefixes.add(attribute_name[:-1])
+            else:
+                dependencies.names.add(attribute_name)
+        elif outcome['action'] == 'whitelist_attribute_value':
+            dependencies.all_names = True
+        return dependencies
+
+
     def add_outcomes(self, _rule, rule_outcomes, outcomes):
         """
         Filter if attributes match to a rule
@@ -100,3 +100,118 @@ def match(value, needle, condition, negate=False):
         return False
     except Exception as error:
         raise Exception(f"Condition Failed: {condition}, Value: {value}, Needed: {needle}. Hint: {error}")
+
+
+#   .-- Compiled Matches
+# pylint: disable=missing-function-docstring
+def _lower(value):
+    """
+    Lowercase like match() does: only strings
+    """
+    if isinstance(value, str):
+        return value.lower()
+    return value
+
+def _check_equal(needle, value):
+    return _lower(value) == needle
+
+def _check_in(needle, value):
+    return needle in _lower(value)
+
+def _check_not_in(needle, value):
+    return needle not in _lower(value)
+
+def _check_in_list(needle, value):
+    try:
+        return _lower(value) in needle
+    except TypeError:
+        # Unhashable values can never be part of the list
+        return False
+
+def _check_swith(needle, value):
+    return str(_lower(value)).startswith(needle)
+
+def _check_ewith(needle, value):
+    return str(_lower(value)).endswith(needle)
+
+def _check_regex(needle, value):
+    return bool(needle.match(str(_lower(value))))
+
+def _check_bool(needle, value):
+    return make_bool(value) == needle
+
+def _check_unknown(_needle, _value):
+    return False
+
+_CHECKS = {
+    'equal': _check_equal,
+    'in': _check_in,
+    'not_in': _check_not_in,
+    'in_list': _check_in_list,
+    'swith': _check_swith,
+    'ewith': _check_ewith,
+    'regex': _check_regex,
+    'bool': _check_bool,
+}
+
+
+class Matcher():
+    """
+    Precompiled version of match() for a fixed needle and condition.
+
+    The needle is lowered, split or compiled only once, so calling the
+    object with a value gives the same result as match(value, needle, condition, negate).
+    Only module level functions are referenced, so Matchers can be pickled
+    into worker processes.
+    """
+    __slots__ = ('needle', 'raw_needle', 'condition', 'negate', 'check', 'constant')
+
+    def __init__(self, needle, condition, negate=False):
+        """
+        Prepare the Needle
+        """
+        self.raw_needle = needle
+        self.condition = condition
+        self.negate = bool(negate)
+        self.needle = None
+        self.check = _check_unknown
+        self.constant = None
+
+        if condition == 'ignore':
+            # Negated ignore never matches, else always
+            self.constant = not negate
+            return
+
+        try:
+            if condition == 'bool':
+                self.needle = make_bool(needle)
+            else:
+                needle = str(needle).lower()
+                if condition == 'in_list':
+                    self.needle = frozenset(x.strip() for x in needle.split(','))
+                elif condition == 'regex':
+                    self.needle = re.compile(needle)
+                else:
+                    self.needle = needle
+            self.check = _CHECKS.get(condition, _check_unknown)
+            if self.check is _check_unknown:
+                # match() returns False for unknown conditions, negated or not
+                self.constant = False
+        except Exception: # pylint: disable=broad-except
+            # Let match() raise its error, but only once the condition is really used
+            self.check = None
+
+    def __call__(self, value):
+        """
+        Check the value
+        """
+        if self.constant is not None:
+            return self.constant
+        if self.check is None:
+            return match(value, self.raw_needle, self.condition, self.negate)
+        try:
+            return bool(self.check(self.needle, value)) != self.negate
+        except Exception as error:
+            raise Exception(f"Condition Failed: {self.condition}, "\
+                            f"Value: {value}, Needed: {self.raw_needle}. Hint: {error}")
+#.
@@ -188,3 +188,78 @@ class CustomAttribute(db.EmbeddedDocument):
         'strict': False
     }
 #.
+#   .-- Rule Statistics
+class RuleConditionStats(db.Document):
+    """
+    Cost and Selectivity of a single Rule Condition,
+    collected by sampling during the runs.
+    The condition_key is a hash of the condition,
+    so changing a condition starts new statistics.
+    """
+    rule_id = db.StringField(required=True)
+    condition_key = db.StringField(required=True)
+
+    evaluations = db.LongField(default=0)
+    hits = db.LongField(default=0)
+    cost_ns = db.LongField(default=0)
+
+    last_update = db.DateTimeField()
+
+    meta = {
+        'strict': False,
+        'indexes': [
+            {'fields': ['rule_id', 'condition_key'], 'unique': True},
+        ],
+    }
+#.
+#   .-- Rule Outcome Cache
+class RuleOutcomeCache(db.Document):
+    """
+    Outcomes of a Rule set, shared between all Hosts
+    with the same Attributes. The key is a hash of the Rule set,
+    its version, the Attributes and the Hostname if needed.
+    """
+    key = db.StringField(required=True, unique=True)
+    rule_group = db.StringField()
+    outcomes = db.DictField()
+
+    last_update = db.DateTimeField()
+
+    meta = {
+        'strict': False,
+        'indexes': [
+            'last_update',
+        ],
+    }
+#.
+#   .-- Rule Profiling
+class RuleProfile(db.Document):
+    """
+    Cost of a single Rule during one run.
+    Only collected if RULE_PROFILING is enabled.
+    """
+    run_id = db.StringField(required=True)
+    run_name = db.StringField()
+    source = db.StringField()
+
+    rule_class = db.StringField(required=True)
+    rule_id = db.StringField(required=True)
+    rule_name = db.StringField()
+
+    evaluations = db.LongField(default=0)
+    hits = db.LongField(default=0)
+    condition_ns = db.LongField(default=0)
+    outcome_ns = db.LongField(default=0)
+    total_ns = db.LongField(default=0)
+
+    last_update = db.DateTimeField()
+
+    meta = {
+        'strict': False,
+        'indexes': [
+            {'fields': ['run_id', 'rule_class', 'rule_id'], 'unique': True},
+            # Profiles are removed after 14 days
+            {'fields': ['last_update'], 'expireAfterSeconds': 14 * 24 * 3600},
+        ],
+    }
+#.
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Outcome Cache shared between Hosts
+"""
+#pylint: disable=logging-fstring-interpolation
+import json
+import hashlib
+from copy import deepcopy
+from collections import OrderedDict
+from datetime import datetime
+
+from application import logger, app
+from application.modules.rule.models import RuleOutcomeCache
+
+
+def outcome_key(rule_group, version, attributes, hostname=None):
+    """
+    Content based Key for the Outcomes of a Rule set.
+    Returns None if the Attributes can't be serialized.
+    """
+    try:
+        content = json.dumps([rule_group, version, hostname, attributes],
+                             sort_keys=True, default=repr)
+    except TypeError:
+        return None
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class OutcomeCache():
+    """
+    Keeps Outcomes of the current run in Memory,
+    and stores them in the database for the next runs.
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def maxsize():
+        """
+        Number of Outcomes kept, in Memory and in the database
+        """
+        return app.config['RULE_OUTCOME_CACHE_SIZE']
+
+    def _remember(self, key, outcomes):
+        """
+        Add to the Memory, drop the oldest entries if full
+        """
+        self.memory[key] = outcomes
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize():
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Outcomes for key, or None if not known
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return deepcopy(self.memory[key])
+        entry = RuleOutcomeCache.objects(key=key).only('outcomes').first()
+        if entry:
+            self._remember(key, entry.outcomes)
+            self.hits += 1
+            return deepcopy(entry.outcomes)
+        self.misses += 1
+        return None
+
+    def reset_counters(self):
+        """
+        Start counting Hits and Misses again
+        """
+        self.hits = 0
+        self.misses = 0
+
+    def set(self, key, rule_group, outcomes):
+        """
+        Store Outcomes for key
+        """
+        self._remember(key, deepcopy(outcomes))
+        RuleOutcomeCache.objects(key=key).update_one(upsert=True,
+                                                     set__rule_group=rule_group,
+                                                     set__outcomes=outcomes,
+                                                     set__last_update=datetime.now())
+
+    def trim(self):
+        """
+        Delete the oldest entries of the database, if there are too many
+        """
+        # Read from the Collection Metadata, no need to count the Documents
+        collection = RuleOutcomeCache._get_collection() # pylint: disable=protected-access
+        overflow = collection.estimated_document_count() - self.maxsize()
+        if overflow <= 0:
+            return
+        oldest = RuleOutcomeCache.objects.order_by('last_update').only('id').limit(overflow)
+        RuleOutcomeCache.objects(id__in=[x.id for x in oldest]).delete()
+        logger.debug(f"Removed {overflow} entries from Outcome Cache")
+
+    def clear(self, rule_group=None):
+        """
+        Delete all Outcomes, or the ones of Rule groups starting with rule_group
+        """
+        self.memory.clear()
+        if rule_group:
+            RuleOutcomeCache.objects(rule_group__istartswith=rule_group).delete()
+        else:
+            RuleOutcomeCache.drop_collection()
+
+outcome_cache = OutcomeCache()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Profiling of single Rules
+"""
+import os
+from datetime import datetime
+from multiprocessing import util
+from bson import ObjectId
+
+from application import app
+from application.modules.rule.models import RuleProfile
+
+PROFILE_FLUSH_EVALUATIONS = 10000
+
+
+class RuleProfiler():
+    """
+    Collects Evaluations, Hits and Time per Rule of this process
+    and adds them to the Profile of the current run
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.run_id = None
+        self.pending = {}
+        self.evaluations = 0
+        self.pid = os.getpid()
+
+    def enabled(self):
+        """
+        Profiling is only done inside of a run
+        """
+        return bool(self.run_id) and app.config['RULE_PROFILING']
+
+    def start_run(self):
+        """
+        Start a new run, all following Rule evaluations belong to it.
+        Called by the Command entry points.
+        """
+        if self.pending:
+            self.flush()
+        self.run_id = str(ObjectId())
+        self.pending = {}
+        self.evaluations = 0
+        self.pid = os.getpid()
+        return self.run_id
+
+    def add(self, rule_class, rule, evaluations, hits, condition_ns, outcome_ns):
+        """
+        Add the cost of a compiled Rule
+        """
+        # pylint: disable=too-many-arguments
+        if os.getpid() != self.pid:
+            # Worker processes never save the Plugin log,
+            # so they flush once they exit
+            self.pid = os.getpid()
+            self.pending = {}
+            self.evaluations = 0
+            util.Finalize(self, self.flush, exitpriority=10)
+        entry = self.pending.setdefault((rule_class, rule.rule_id), [rule.name, 0, 0, 0, 0])
+        entry[1] += evaluations
+        entry[2] += hits
+        entry[3] += condition_ns
+        entry[4] += outcome_ns
+        self.evaluations += evaluations
+        if self.evaluations >= PROFILE_FLUSH_EVALUATIONS:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the pending Profile to the Database
+        """
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        self.evaluations = 0
+        if not self.run_id:
+            return
+        now = datetime.now()
+        for (rule_class, rule_id), entry in pending.items():
+            name, evaluations, hits, condition_ns, outcome_ns = entry
+            RuleProfile.objects(run_id=self.run_id, rule_class=rule_class,
+                                rule_id=rule_id).update_one(upsert=True,
+                                                            set__rule_name=name,
+                                                            inc__evaluations=evaluations,
+                                                            inc__hits=hits,
+                                                            inc__condition_ns=condition_ns,
+                                                            inc__outcome_ns=outcome_ns,
+                                                            inc__total_ns=condition_ns + outcome_ns,
+                                                            set__last_update=now)
+
+    def finish_run(self, run_id, name, source):
+        """
+        Write the rest and name the given run
+        """
+        if not run_id or not app.config['RULE_PROFILING']:
+            return
+        self.flush()
+        RuleProfile.objects(run_id=run_id).update(set__run_name=name, set__source=source)
+
+rule_profiler = RuleProfiler()
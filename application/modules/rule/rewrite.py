@@ -5,6 +5,7 @@ Rewrite
 #pylint: disable=logging-fstring-interpolation
 import ast
 from application.modules.rule.rule import Rule
+from application.modules.rule.compiler import RuleDependencies
 from application import logger
 from application.helpers.syncer_jinja import render_jinja
 
@@ -15,6 +16,16 @@ class Rewrite(Rule):
 
     name = "Rewrite"
 
+    def outcome_dependencies(self, outcome):
+        """
+        The rewritten Attribute and the Variables of the Templates
+        """
+        dependencies = RuleDependencies()
+        dependencies.names.add(outcome['old_attribute_name'])
+        dependencies.add_templates([outcome.get('new_attribute_name'), outcome.get('new_value')])
+        return dependencies
+
+
     def get_attribute_name(self, outcome):
         """
         Get Old and New Attribute Name
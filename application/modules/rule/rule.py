@@ -6,12 +6,17 @@ Handle Rule Matching
 # pylint: disable=logging-fstring-interpolation
 import ast
 import re
+from time import perf_counter_ns
 from rich.console import Console
 from rich.table import Table
 from rich import box
 
 from application import logger, app
-from application.modules.rule.match import match
+from application.modules.rule.compiler import compile_rules, AttributeIndex, take_sample, \
+                                              evaluate_batch, rule_set_version, \
+                                              collect_dependencies, RuleDependencies
+from application.modules.rule.outcome_cache import outcome_cache, outcome_key
+from application.modules.rule.profiling import rule_profiler
 from application.helpers.syncer_jinja import render_jinja
 
 class Rule(): # pylint: disable=too-few-public-methods
@@ -21,6 +26,12 @@ class Rule(): # pylint: disable=too-few-public-methods
     debug = False
     debug_lines = []
     rules = []
+    compiled_rules = []
+    compiled_source = None
+    rules_version = None
+    dependencies = None
+    share_outcomes = True
+    batch_hits = None
     name = ""
     attributes = {}
     hostname = False
@@ -54,54 +65,58 @@ class Rule(): # pylint: disable=too-few-public-methods
             input_str = input_str.replace(needle, replacer)
         return input_str.strip()
 
-    def _check_attribute_match(self, condition):
-        """
-        Check if on of the given attributes match the rule
-        """
-        needed_tag = condition['tag']
-        tag_match = condition['tag_match']
-        tag_match_negate = condition['tag_match_negate']
-
-        needed_value = condition['value']
-        value_match = condition['value_match']
-        value_match_negate = condition['value_match_negate']
-
-
-        if tag_match == 'ignore' and tag_match_negate:
-            # This Case Checks that Tag NOT Exists
-            if needed_tag not in self.attributes.keys():
-                return True
-            return False
-        # Wee need to find out if tag AND tag value match
-        for tag, value in self.attributes.items():
-            # Check if Tag matchs
-            if app.config['ADVANCED_RULE_DEBUG']:
-                logger.debug(f"Check Tag: {tag} vs needed: {needed_tag} "\
-                             f"for {tag_match}, Negate: {tag_match_negate}")
-            if match(tag, needed_tag, tag_match, tag_match_negate):
-                if app.config['ADVANCED_RULE_DEBUG']:
-                    logger.debug('--> HIT')
-                    logger.debug(f"Check Value: {repr(value)} vs needed: {repr(needed_value)} "\
-                                 f"for {value_match}, Negate: {value_match_negate}")
-                # Tag Match, see if Value Match
-                if match(value, needed_value, value_match, value_match_negate):
-                    if app.config['ADVANCED_RULE_DEBUG']:
-                        logger.debug('--> HIT')
-                    return True
-        return False
+    def compile_rules(self):
+        """
+        Compile the Rules once, so that they can be reused for every Host.
+        Compiles again if a new set of Rules is assigned.
+        """
+        if self.compiled_source is not self.rules:
+            self.compiled_rules = compile_rules(self.rules)
+            self.compiled_source = self.rules
+            self.rules_version = rule_set_version(self.compiled_rules)
+            self.dependencies = collect_dependencies(self.compiled_rules,
+                                                     self.outcome_dependencies)
+        return self.compiled_rules
+
+    def outcome_dependencies(self, outcome):
+        """
+        Attributes a single Outcome reads.
+        Default are all of them, overwrite if the exact ones are known.
+        """
+        dependencies = RuleDependencies()
+        dependencies.all_names = True
+        dependencies.add_templates(outcome.values())
+        return dependencies
 
-    @staticmethod
-    def _check_hostname_match(condition, hostname):
+    def get_cache_name(self):
         """
-        Check if Condition Matchs to Hostname
+        Name of the Host Cache for the Outcomes of this Rule set
         """
-        needed = condition['hostname'].lower()
-        host_match = condition['hostname_match'].lower()
-        negate = condition['hostname_match_negate']
+        if self.cache_name:
+            return self.cache_name
+        return self.__class__.__qualname__.replace('.','')
 
-        if match(hostname.lower(), needed, host_match, negate):
-            return True
-        return False
+    def prepare_batch(self, entries):
+        """
+        Evaluate the Rules at once for a batch of Hosts.
+        Entries are tuples of db_host and Attributes.
+        The following check_rules() calls for these Hosts use the result.
+        """
+        todo = [(db_host.hostname, attributes) for db_host, attributes in entries \
+                  if self.get_cached_outcomes(db_host,
+                                              self.get_fingerprint(db_host, attributes)) is None]
+        on_rule = None
+        if rule_profiler.enabled():
+            rule_class = self.__class__.__name__
+            on_rule = lambda rule, evaluations, cost_ns: \
+                    rule_profiler.add(rule_class, rule, evaluations, 0, cost_ns, 0)
+        self.batch_hits = evaluate_batch(self.compile_rules(), todo, on_rule)
+
+    def finish_batch(self):
+        """
+        Forget the batch results
+        """
+        self.batch_hits = None
 
     def check_rules(self, hostname): #pylint: disable=too-many-branches
         """
@@ -109,6 +124,21 @@ class Rule(): # pylint: disable=too-few-public-methods
         """
         #pylint: disable=too-many-branches
 
+        profile = rule_profiler.enabled()
+        if self.batch_hits is not None and not self.debug:
+            hits = self.batch_hits.get(hostname)
+            # Hosts with failing conditions are not part of the batch result
+            if hits is not None:
+                outcomes = {}
+                for rule in hits:
+                    started = perf_counter_ns()
+                    outcomes = self.add_outcomes(rule.rule, [dict(x) for x in rule.outcomes],
+                                                 outcomes)
+                    if profile:
+                        rule_profiler.add(self.__class__.__name__, rule, 0, 1,
+                                          0, perf_counter_ns() - started)
+                return outcomes
+
         rule_descriptions = {
             'any' : "ANY can match",
             'all' : "ALL must match",
@@ -125,57 +155,51 @@ class Rule(): # pylint: disable=too-few-public-methods
             table.add_column("Rule Name")
             table.add_column("Rule ID")
             table.add_column("Last Match")
+            table.add_column("Conditions")
 
         outcomes = {}
-        for rule in self.rules:
-            if app.config['ADVANCED_RULE_DEBUG']:
+        index = AttributeIndex(self.attributes, hostname.lower())
+        advanced_debug = app.config['ADVANCED_RULE_DEBUG']
+        # Some Host evaluations are measured for the Condition Statistics
+        sample = take_sample()
+        for rule in self.compile_rules():
+            if advanced_debug:
                 logger.debug('##########################')
                 logger.debug(f'Check Rule: {rule.name}')
                 logger.debug('##########################')
-            rule = rule.to_mongo()
-            rule_hit = False
-            if rule['condition_typ'] == 'any':
-                for condtion in rule['conditions']:
-                    local_hit = False
-                    if condtion['match_type'] == 'tag':
-                        local_hit = self._check_attribute_match(condtion)
-                    else:
-                        local_hit = self._check_hostname_match(condtion, hostname)
-                    if local_hit:
-                        rule_hit = True
-            elif rule['condition_typ'] == 'all':
-                negativ_match = False
-                for condtion in rule['conditions']:
-                    if condtion['match_type'] == 'tag':
-                        if not self._check_attribute_match(condtion):
-                            negativ_match = True
-                    else:
-                        if not self._check_hostname_match(condtion, hostname):
-                            negativ_match = True
-                if not negativ_match:
-                    rule_hit = True
-            elif rule['condition_typ'] == 'anyway':
-                rule_hit = True
-
-
+            started = perf_counter_ns()
+            if sample:
+                rule_hit = rule.matches_sampled(index)
+            else:
+                rule_hit = rule.matches(index)
+            condition_ns = perf_counter_ns() - started
 
             if self.debug:
                 debug_data = {
                     "group": self.name,
                     "hit": rule_hit,
-                    "condition_type": rule_descriptions[rule['condition_typ']],
-                    "name": rule['name'],
-                    "id": str(rule['_id']),
-                    "last_match": str(rule['last_match']),
+                    "condition_type": rule_descriptions[rule.condition_typ],
+                    "name": rule.name,
+                    "id": rule.rule_id,
+                    "last_match": str(rule.last_match),
+                    "conditions": rule.describe_conditions(),
                 }
                 self.debug_lines.append(debug_data)
-                table.add_row(str(rule_hit), rule_descriptions[rule['condition_typ']],\
-                              rule['name'][:30], str(rule['_id']), str(rule['last_match']))
+                table.add_row(str(rule_hit), rule_descriptions[rule.condition_typ],\
+                              rule.name[:30], rule.rule_id, str(rule.last_match),
+                              rule.describe_conditions())
+            outcome_ns = 0
             if rule_hit:
-                outcomes = self.add_outcomes(rule, [dict(x) for x in rule['outcomes']], outcomes)
-                # If rule has matched, and option is set, we are done
-                if rule['last_match']:
-                    break
+                started = perf_counter_ns()
+                outcomes = self.add_outcomes(rule.rule, [dict(x) for x in rule.outcomes],
+                                             outcomes)
+                outcome_ns = perf_counter_ns() - started
+            if profile:
+                rule_profiler.add(self.__class__.__name__, rule, 1, int(rule_hit),
+                                  condition_ns, outcome_ns)
+            # If rule has matched, and option is set, we are done
+            if rule_hit and rule.last_match:
+                break
         if self.debug:
             console = Console()
             console.print(table)
@@ -283,21 +307,64 @@ class Rule(): # pylint: disable=too-few-public-methods
         return self.check_rules(db_host.hostname)
 
 
+    def can_share_outcomes(self, db_host):
+        """
+        Outcomes can be taken from other Hosts with the same Attributes.
+        Overwrite if the Rules have side effects for the Host.
+        """
+        # pylint: disable=unused-argument
+        return self.share_outcomes and not self.debug \
+                    and bool(app.config['RULE_OUTCOME_CACHE_SIZE'])
+
+    def get_fingerprint(self, db_host, attributes):
+        """
+        Key for the Outcomes of a Host. Hash of the Rule set version,
+        the Attributes the Rules depend on, and the Hostname if needed.
+        """
+        self.compile_rules()
+        hostname = None
+        if self.dependencies.hostname:
+            hostname = db_host.hostname
+        return outcome_key(self.get_cache_name(), self.rules_version,
+                           self.dependencies.select(attributes), hostname)
+
+    def get_cached_outcomes(self, db_host, fingerprint):
+        """
+        Outcomes from the Host Cache, if they are still valid for the fingerprint
+        """
+        entry = db_host.cache.get(self.get_cache_name())
+        if isinstance(entry, dict) and 'fingerprint' in entry \
+                and entry['fingerprint'] == fingerprint:
+            return entry['outcomes']
+        return None
+
     def get_outcomes(self, db_host, attributes):
         """
         Handle Return of outcomes.
         """
-        cache = self.__class__.__qualname__.replace('.','')
-        if self.cache_name:
-            cache = self.cache_name
-        if cache in db_host.cache:
+        cache = self.get_cache_name()
+        fingerprint = self.get_fingerprint(db_host, attributes)
+        rules = self.get_cached_outcomes(db_host, fingerprint)
+        if rules is not None:
             logger.debug(f"Using Rule Cache for {db_host.hostname}")
-            return db_host.cache[cache]
+            return rules
 
         self.attributes = attributes
         self.hostname = db_host.hostname
         self.db_host = db_host
-        rules = self.check_rule_match(db_host)
-        db_host.cache[cache] = rules
+        shared = fingerprint and self.can_share_outcomes(db_host)
+        if shared:
+            rules = outcome_cache.get(fingerprint)
+        if rules is None:
+            rules = self.check_rule_match(db_host)
+            if shared:
+                outcome_cache.set(fingerprint, cache, rules)
+        else:
+            logger.debug(f"Using shared Outcome Cache for {db_host.hostname}")
+        db_host.cache[cache] = {
+            'fingerprint': fingerprint,
+            'rules_version': self.rules_version,
+            'outcomes': rules,
+        }
         db_host.save()
         return rules
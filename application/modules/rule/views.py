@@ -464,3 +464,65 @@ class RewriteAttributeView(RuleModelView):
 
         super().__init__(model, **kwargs)
 #.
+#   .-- Rule Cost
+def format_ns(_view, _context, model, name):
+    """
+    Nanoseconds as Milliseconds
+    """
+    return f"{model[name] / 1000000:.3f} ms"
+
+
+class RuleCostView(DefaultModelView): #pylint: disable=too-few-public-methods
+    """
+    Profile of the Rules per run
+    """
+
+    can_edit = False
+    can_delete = False
+    can_create = False
+    can_export = True
+
+    export_types = ['csv']
+
+    column_extra_row_actions = [] # Overwrite because of clone icon
+
+    column_list = (
+        'run_name', 'rule_class', 'rule_name', 'evaluations', 'hits',
+        'condition_ns', 'outcome_ns', 'total_ns', 'last_update',
+    )
+
+    column_labels = {
+        'condition_ns': "Condition Time",
+        'outcome_ns': "Outcome Time",
+        'total_ns': "Total Time",
+    }
+
+    column_default_sort = ('total_ns', True)
+
+    column_sortable_list = (
+        'run_name',
+        'rule_class',
+        'rule_name',
+        'evaluations',
+        'hits',
+        'condition_ns',
+        'outcome_ns',
+        'total_ns',
+        'last_update',
+    )
+
+    column_formatters = {
+        'condition_ns': format_ns,
+        'outcome_ns': format_ns,
+        'total_ns': format_ns,
+    }
+
+    column_filters = (
+        'run_id', 'run_name', 'source', 'rule_class', 'rule_name',
+    )
+    page_size = 100
+
+    def is_accessible(self):
+        """ Overwrite """
+        return current_user.is_authenticated and current_user.has_right('rule')
+#.
@@ -1,10 +1,10 @@
 """
 BMC Remedy Plugin
 """
-import requests
 import click
 
 from application import app
+from application.helpers.http import create_session
 
 from syncerapi.v1 import (
     get_account,
@@ -32,6 +32,7 @@ class RemedySyncer():
         self.password = config['password']
         self.verify = not app.config.get('DISABLE_SSL_ERRORS')
         self.config = config
+        self.session = create_session()
 
 #   .-- get_auth_token
     def get_auth_token(self):
@@ -49,7 +50,7 @@ class RemedySyncer():
             'Content-Type': 'application/x-www-form-urlencoded'
         }
 
-        response = requests.post(
+        response = self.session.post(
               url,
               data=auth_data,
               headers=headers,
@@ -76,7 +77,7 @@ class RemedySyncer():
             'Authorization': f'AR-JWT {auth_token}'
         }
 
-        response = requests.get(
+        response = self.session.get(
               url,
               headers=headers,
               verify=self.verify,
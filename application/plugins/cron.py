@@ -10,6 +10,7 @@ from mongoengine.errors import DoesNotExist
 from application import app, cron_register, log
 from application.modules.debug import ColorCodes as CC
 from application.models.cron import CronStats, CronGroup
+from application.modules.rule.profiling import rule_profiler
 
 @app.cli.group(name='cron')
 def _cli_cron():
@@ -99,6 +100,8 @@ def run_job(group_name):
         job = CronGroup.objects.get(enabled=True, name=group_name)
         for task in job.jobs:
             print(f"{CC.UNDERLINE}{CC.OKBLUE}Task: {task.name} {CC.ENDC}")
+            # Every Task gets its own Rule Profile
+            rule_profiler.start_run()
             if task.account:
                 account_name = task.account.name
                 cron_register[task.command](account=account_name)
@@ -150,6 +153,7 @@ def jobs(): #pylint: disable=invalid-name
                     print(f"{CC.UNDERLINE}{CC.OKBLUE}Task: {task.name} {CC.ENDC}")
                     stats.last_message = f"{now}: Started {task.name} (PID: {os.getpid()})"
                     stats.save()
+                    rule_profiler.start_run()
                     try:
                         if task.account:
                             account_name = task.account.name
@@ -11,6 +11,7 @@ from application.modules.debug import ColorCodes
 from application.helpers.get_account import get_account_by_name
 from application.helpers.cron import register_cronjob
 from application.helpers.inventory import run_inventory
+from application.helpers.importer import run_import
 
 @app.cli.group(name='csv')
 def _cli_csv():
@@ -84,31 +85,38 @@ def import_hosts(csv_path=None, delimiter=";", hostname_field="host", account=No
     filename = csv_path.split('/')[-1]
     print(f"{ColorCodes.OKBLUE}Started {ColorCodes.ENDC}"\
           f"{ColorCodes.UNDERLINE}{filename}{ColorCodes.ENDC}")
-    with open(csv_path, newline='', encoding=encoding) as csvfile:
-        reader = csv.DictReader(csvfile, delimiter=delimiter)
-        for row in reader:
-            try:
-                hostname = row[hostname_field].strip()
-                keys = list(row.keys())
-                for dkey in keys:
-                    if not row[dkey]:
-                        del row[dkey]
-                if 'rewrite_hostname' in account and account['rewrite_hostname']:
-                    hostname = Host.rewrite_hostname(hostname, account['rewrite_hostname'], row)
-                print(f" {ColorCodes.OKGREEN}** {ColorCodes.ENDC} Update {hostname}")
-                host_obj = Host.get_host(hostname)
-                del row[hostname_field]
-                host_obj.update_host(row)
-                if account:
-                    do_save = host_obj.set_account(account_dict=account)
-                else:
-                    do_save = True
-                    host_obj.set_account(f"csv_{filename}", filename)
-
-                if do_save:
-                    host_obj.save()
-            except Exception as error:
-                print(f"Error: {error}")
+
+    def get_rows():
+        """ Hostname and Labels of every Row """
+        with open(csv_path, newline='', encoding=encoding) as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=delimiter)
+            for row in reader:
+                try:
+                    hostname = row[hostname_field].strip()
+                    keys = list(row.keys())
+                    for dkey in keys:
+                        if not row[dkey]:
+                            del row[dkey]
+                    if account and account.get('rewrite_hostname'):
+                        hostname = Host.rewrite_hostname(hostname,
+                                                         account['rewrite_hostname'], row)
+                    del row[hostname_field]
+                except Exception as error:
+                    print(f"Error: {error}")
+                    continue
+                yield hostname, row
+
+    if account:
+        run_import(account, get_rows())
+        return
+
+    def set_account(host_obj):
+        """ The File is the Account if no Account is given """
+        host_obj.set_account(f"csv_{filename}", filename)
+        return True
+
+    run_import(None, get_rows(), account_func=set_account,
+               seen_config={'id': f"csv_{filename}", 'name': filename, 'object_type': None})
 
 @_cli_csv.command('import_hosts')
 @click.argument("csv_path", default="")
@@ -3,9 +3,9 @@ Import Jira Data
 """
 #pylint: disable=too-many-locals
 import click
-import requests
 from application import app
 from application import logger
+from application.helpers.http import create_session
 from application.helpers.cron import register_cronjob
 from application.helpers.get_account import get_account_by_name
 from application.models.host import Host
@@ -24,6 +24,7 @@ def import_jira(account):
     page_size = config['page_size']
     user = config['username']
     password = config['password']
+    session = create_session()
 
     # Platforms
     meta = {}
@@ -46,12 +47,12 @@ def import_jira(account):
         url = what['url']
         meta.setdefault(name, {})
         print(f"{ColorCodes.OKGREEN} -- {ColorCodes.ENDC}Request: Read {name} Data")
-        response = requests.get(url, auth=(user, password), timeout=30, verify=verify)
+        response = session.get(url, auth=(user, password), timeout=30, verify=verify)
         meta[name] = {x['key']: x[what['attriubte']] for x in response.json()['data']}
 
     url = f"{config['address']}/servers?pageSize={page_size}"
     print(f"{ColorCodes.OKGREEN} -- {ColorCodes.ENDC}Request: Read all Hosts")
-    response = requests.get(url, auth=(user, password), timeout=30, verify=verify)
+    response = session.get(url, auth=(user, password), timeout=30, verify=verify)
     all_data = response.json()['data']
     total = len(all_data)
     counter = 0
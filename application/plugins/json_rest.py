@@ -13,8 +13,8 @@ import click
 from application import app, logger
 from application.models.host import Host
 from application.modules.plugin import Plugin, ResponseDataException
-from application.modules.debug import ColorCodes
 from application.helpers.cron import register_cronjob
+from application.helpers.importer import run_import
 
 class RestImport(Plugin):
     """
@@ -63,23 +63,21 @@ class RestImport(Plugin):
         """
         if self.config.get('data_key'):
             data = data[self.config['data_key']]
-        for entry in data:
 
-            hostname = entry[self.config['hostname_field']]
-            if not hostname:
-                continue
-            del entry[self.config['hostname_field']]
-            if 'rewrite_hostname' in self.config and self.config['rewrite_hostname']:
-                hostname = Host.rewrite_hostname(hostname, self.config['rewrite_hostname'], entry)
-
-            print(f" {ColorCodes.OKGREEN}** {ColorCodes.ENDC} Update {hostname}")
-            host_obj = Host.get_host(hostname)
-            host_obj.update_host(entry)
-
-            do_save = host_obj.set_account(account_dict=self.config)
-
-            if do_save:
-                host_obj.save()
+        def get_entries():
+            """ Hostname and Labels of every Entry """
+            for entry in data:
+                hostname = entry[self.config['hostname_field']]
+                if not hostname:
+                    continue
+                del entry[self.config['hostname_field']]
+                if 'rewrite_hostname' in self.config and self.config['rewrite_hostname']:
+                    hostname = Host.rewrite_hostname(hostname,
+                                                     self.config['rewrite_hostname'], entry)
+                yield hostname, entry
+
+        stats = run_import(self.config, get_entries())
+        self.log_details += list(stats.items())
 
 
 def import_hosts_json(account):
@@ -2,12 +2,12 @@
 """Import LDAP Data"""
 import click
 from application import app
-from application.models.host import Host
 from application.helpers.get_account import get_account_by_name
 from application.modules.debug import ColorCodes
 from application.helpers.cron import register_cronjob
 
 from application.helpers.inventory import run_inventory
+from application.helpers.importer import run_import
 
 try:
     import ldap
@@ -102,16 +102,7 @@ def ldap_import(account):
     LDAP Import
     """
     config = get_account_by_name(account)
-    for hostname, labels in _inner_import(config):
-        print(f" {ColorCodes.OKGREEN}** {ColorCodes.ENDC} Update {hostname}")
-        host_obj = Host.get_host(hostname)
-        do_save = host_obj.set_account(account_dict=config)
-        host_obj.update_host(labels)
-        if do_save:
-            print(f" {ColorCodes.OKGREEN} * {ColorCodes.ENDC} Updated Labels")
-            host_obj.save()
-        else:
-            print(f" {ColorCodes.WARNING} * {ColorCodes.ENDC} Managed by diffrent master")
+    run_import(config, _inner_import(config), account_first=True)
 
 @cli_ldap.command('import_objects')
 @click.argument('account')
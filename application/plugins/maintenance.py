@@ -10,8 +10,10 @@ import secrets
 from pprint import pformat
 import click
 from mongoengine.errors import DoesNotExist, ValidationError
+from pymongo.errors import PyMongoError
 from application import app, logger, log
-from application.models.host import Host
+from application.models.host import Host, HostCache
+from application.modules.rule.outcome_cache import outcome_cache
 from application.modules.debug import ColorCodes as CC
 from application.modules.checkmk.poolfolder import remove_seat
 from application.models.account import Account
@@ -104,17 +106,120 @@ def delete_cache(cache_name):
     Delete object Cache
     """
     print(f"{CC.HEADER} ***** Delete Cache ***** {CC.ENDC}")
-    for host in Host.objects():
-        logger.debug(f"Handling Host {host.hostname}")
-        if cache_name:
-            for key in list(host.cache.keys()):
-                if key.lower().startswith(cache_name):
-                    del host.cache[key]
-        else:
-            host.cache = {}
-        host.save()
+    if cache_name:
+        HostCache.objects(name__istartswith=cache_name).delete()
+    else:
+        HostCache.drop_collection()
+        # Caches from before they had their own collection
+        Host.objects(__raw__={'cache': {'$exists': True}}).update(__raw__={'$unset': {'cache': 1}})
+    outcome_cache.clear(cache_name)
     print(f"{CC.OKGREEN}  ** {CC.ENDC}Done")
 
+#.
+#   .-- Command: Check Indexes
+def get_plan_stages(plan):
+    """
+    All Stages and Index Names of a Query Plan
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append((plan['stage'], plan.get('indexName')))
+        for value in plan.values():
+            stages += get_plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages += get_plan_stages(value)
+    return stages
+
+
+def get_hot_queries():
+    """
+    The Host Queries which run on every Import, Export or Maintenance
+    """
+    seen_before = datetime.datetime.now() - datetime.timedelta(days=1)
+    return [
+        ("Export Hosts", Host.get_export_hosts()),
+        ("Objects by Filter", Host.objects_by_filter(['host'])),
+        ("Host Count", Host.objects(is_object=False)),
+        ("Not updated Hosts", Host.objects(is_object=False, last_import_seen__lt=seen_before)),
+        ("Maintenance", Host.objects(last_import_seen__lte=seen_before)),
+        ("Maintenance by Account", Host.objects(last_import_seen__lte=seen_before,
+                                                source_account_id="check")),
+        ("Hosts of Account", Host.objects(available=True, source_account_id="check")),
+        ("Hostname Suffix", Host.objects(hostname__endswith=".check")),
+        ("Label Key", Host.objects(__raw__={'labels.check': {'$exists': True}})),
+        ("Inventory Key", Host.objects(__raw__={'inventory.check': {'$exists': True}})),
+    ]
+
+
+@_cli_sys.command('check_indexes')
+def check_indexes():
+    """
+    Explain the most used Host Queries and
+    show the ones which need a Collection Scan
+    """
+    print(f"{CC.HEADER} ***** Check Indexes ***** {CC.ENDC}")
+    Host.ensure_indexes()
+    collection_scans = 0
+    for name, query in get_hot_queries():
+        try:
+            plan = query.explain().get('queryPlanner', {}).get('winningPlan', {})
+        except PyMongoError as error:
+            print(f"{CC.FAIL}  ** {CC.ENDC}{name}: Explain failed: {error}")
+            continue
+        stages = get_plan_stages(plan)
+        indexes = sorted({index for _stage, index in stages if index})
+        if 'COLLSCAN' in [stage for stage, _index in stages]:
+            collection_scans += 1
+            print(f"{CC.FAIL}  ** {CC.ENDC}{name}: COLLSCAN")
+        else:
+            print(f"{CC.OKGREEN}  ** {CC.ENDC}{name}: {', '.join(indexes)}")
+    if collection_scans:
+        print(f"{CC.WARNING}  ** {CC.ENDC}{collection_scans} Queries without Index")
+    else:
+        print(f"{CC.OKGREEN}  ** {CC.ENDC}Done")
+
+#.
+#   .-- Command: Benchmark Rules
+
+@_cli_sys.command('benchmark_rules')
+@click.option("--hosts", default=1000, help="Number of synthetic Hosts")
+@click.option("--rules", default=100, help="Number of Rules per Rule type")
+@click.option("--labels", default=20, help="Number of Labels per Host")
+@click.option("--inventory", default=50, help="Number of Inventory Attributes per Host")
+@click.option("--seed", default=1)
+@click.option("--shared-cache", is_flag=True,
+              help="Use the shared Outcome Cache (writes to the database)")
+@click.option("--output", default="rule_benchmark.json", help="Path of JSON Result File")
+def benchmark_rules(hosts, rules, labels, inventory, seed, shared_cache, output):
+    """
+    Benchmark the Rule Engine with synthetic Hosts and Rules
+
+    Calculates Custom Attributes, Rewrite, Filter and Checkmk Rules.
+    No Checkmk or other target is needed, nothing is exported.
+    """
+    # pylint: disable=import-outside-toplevel
+    from application.modules.rule.benchmark import run_benchmark, write_result
+    print(f"{CC.HEADER} ***** Benchmark Rules ***** {CC.ENDC}")
+    print(f"{CC.UNDERLINE}{hosts} Hosts, {rules} Rules per type, "\
+          f"{labels} Labels, {inventory} Inventory Attributes{CC.ENDC}")
+    result = run_benchmark(hosts, rules, labels, inventory, seed=seed,
+                           shared_cache=shared_cache)
+    print(f"{CC.OKBLUE}  ** {CC.ENDC}Compile: {result['compile_seconds']:.3f}s")
+    print(f"{CC.OKBLUE}  ** {CC.ENDC}Duration: {result['duration_seconds']:.3f}s")
+    print(f"{CC.OKBLUE}  ** {CC.ENDC}Hosts/s: {result['hosts_per_second']:.1f}")
+    print(f"{CC.OKBLUE}  ** {CC.ENDC}Latency p50: {result['latency_ms']['p50']:.3f}ms, "\
+          f"p99: {result['latency_ms']['p99']:.3f}ms")
+    for name, seconds in result['rule_sets_seconds'].items():
+        print(f"{CC.OKBLUE}  ** {CC.ENDC}{name}: {seconds:.3f}s")
+    print(f"{CC.OKBLUE}  ** {CC.ENDC}Peak Memory of the Process: "\
+          f"{result['process_peak_rss_mb']:.1f}MB")
+    if result['failed_hosts']:
+        print(f"{CC.WARNING}  ** {CC.ENDC}Failed Hosts: {result['failed_hosts']}")
+    write_result(result, output)
+    print(f"{CC.OKGREEN}  ** {CC.ENDC}Result written to {output}")
+
 #.
 #   .-- Command: Delete Inventory
 
@@ -155,6 +260,10 @@ def delete_all_hosts(account):
         if account:
             db_filter['inventory__syncer_account'] = account
         print(f"{CC.WARNING}  ** {CC.ENDC}Start deletion")
+        if account:
+            HostCache.objects(host_id__in=Host.objects(**db_filter).scalar('id')).delete()
+        else:
+            HostCache.drop_collection()
         Host.objects(**db_filter).delete()
     else:
         print(f"{CC.OKGREEN}  ** {CC.ENDC}Aborted")
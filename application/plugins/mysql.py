@@ -7,6 +7,7 @@ from application.helpers.get_account import get_account_by_name
 from application.modules.debug import ColorCodes
 from application.helpers.cron import register_cronjob
 from application.helpers.inventory import run_inventory
+from application.helpers.importer import run_import
 try:
     import mysql.connector
 except ImportError:
@@ -39,26 +40,22 @@ def mysql_import(account):
     mycursor.execute(query)
     all_hosts = mycursor.fetchall()
     field_names = config['fields'].split(',')
-    for line in all_hosts:
-        labels = dict(zip(field_names, line))
-        if not labels[config['hostname_field']]:
-            continue
-        hostname = labels[config['hostname_field']].strip()
-        if 'rewrite_hostname' in config and config['rewrite_hostname']:
-            hostname = Host.rewrite_hostname(hostname, config['rewrite_hostname'], labels)
-        if not hostname:
-            continue
-        print(f" {ColorCodes.OKGREEN}* {ColorCodes.ENDC} Check {hostname}")
-        del labels[config['hostname_field']]
 
-        host_obj = Host.get_host(hostname)
-        host_obj.update_host(labels)
-        do_save = host_obj.set_account(account_dict=config)
-        if do_save:
-            print(f" {ColorCodes.OKBLUE} * {ColorCodes.ENDC} Updated Labels")
-            host_obj.save()
-        else:
-            print(f" {ColorCodes.WARNING} * {ColorCodes.ENDC} Managed by diffrent master")
+    def get_rows():
+        """ Hostname and Labels of every Row """
+        for line in all_hosts:
+            labels = dict(zip(field_names, line))
+            if not labels[config['hostname_field']]:
+                continue
+            hostname = labels[config['hostname_field']].strip()
+            if 'rewrite_hostname' in config and config['rewrite_hostname']:
+                hostname = Host.rewrite_hostname(hostname, config['rewrite_hostname'], labels)
+            if not hostname:
+                continue
+            del labels[config['hostname_field']]
+            yield hostname, labels
+
+    run_import(config, get_rows())
 
 def mysql_inventorize(account):
     """
@@ -16,6 +16,7 @@ from syncerapi.v1.core import (
     Plugin,
 )
 from syncerapi.v1.inventory import run_inventory
+from syncerapi.v1.importer import run_import
 
 try:
     import pypyodbc as pyodbc
@@ -79,19 +80,17 @@ class ODBC(Plugin):
         """
         ODBC Import
         """
-        for hostname, labels in self._innter_sql():
-            if 'rewrite_hostname' in self.config and self.config['rewrite_hostname']:
-                hostname = Host.rewrite_hostname(hostname,
-                                                 self.config['rewrite_hostname'], labels)
-            print(f" {cc.OKGREEN}* {cc.ENDC} Check {hostname}")
-            del labels[self.config['hostname_field']]
-            host_obj = Host.get_host(hostname)
-            host_obj.update_host(labels)
-            do_save=host_obj.set_account(account_dict=self.config)
-            if do_save:
-                host_obj.save()
-            else:
-                print(f" {cc.WARNING} * {cc.ENDC} Managed by diffrent master")
+        def get_rows():
+            """ Hostname and Labels of every Row """
+            for hostname, labels in self._innter_sql():
+                if 'rewrite_hostname' in self.config and self.config['rewrite_hostname']:
+                    hostname = Host.rewrite_hostname(hostname,
+                                                     self.config['rewrite_hostname'], labels)
+                del labels[self.config['hostname_field']]
+                yield hostname, labels
+
+        stats = run_import(self.config, get_rows())
+        self.log_details += list(stats.items())
 
     def sql_inventorize(self):
         """
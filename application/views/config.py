@@ -4,7 +4,7 @@ Models Config
 #pylint: disable=no-member
 #pylint: disable=missing-function-docstring
 from application import app
-from application.models.host import Host
+from application.models.host import HostCache
 from application.views.default import DefaultModelView
 from application.helpers.sates import remove_changes
 from flask import flash, redirect
@@ -26,9 +26,7 @@ class ConfigModelView(DefaultModelView):
         Delete all Caches
         """
         remove_changes()
-        for host in Host.objects():
-            host.cache = {}
-            host.save()
+        HostCache.drop_collection()
         return "Activation Done"
 
     def is_accessible(self):
@@ -149,6 +149,7 @@ class ObjectModelView(DefaultModelView):
         'source_account_id',
         'sync_id',
         'labels',
+        'labels_hash',
         'inventory',
         'log',
         'folder',
@@ -259,6 +260,7 @@ class HostModelView(DefaultModelView):
         'source_account_id',
         'sync_id',
         'labels',
+        'labels_hash',
         'inventory',
         'log',
         'folder',
@@ -0,0 +1 @@
+from application.helpers.importer import run_import
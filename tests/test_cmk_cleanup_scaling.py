@@ -0,0 +1,76 @@
+"""
+Scaling of the Cleanup of deleted Hosts in Checkmk
+"""
+import atexit
+
+from application import app
+from application.modules.checkmk.syncer import SyncCMK2
+from application.modules.checkmk.helpers import CheckmkHost
+
+
+class CountingName(str):
+    """
+    Hostname which counts how often it is compared
+    """
+    comparisons = 0
+
+    def __eq__(self, other):
+        CountingName.comparisons += 1
+        return str.__eq__(self, other)
+
+    __hash__ = str.__hash__
+
+
+def make_syncer(num_hosts, num_deleted):
+    """
+    Syncer with num_hosts stubbed Checkmk Hosts,
+    all but num_deleted of them synced in this run
+    """
+    syncer = SyncCMK2()
+    # Nothing to log, there is no database
+    atexit.unregister(syncer.save_log)
+    syncer.account_id = 'account'
+    syncer.checkmk_hosts = {
+        CountingName(f"host{idx}"): CheckmkHost('/', {'labels': {'cmdb_syncer': 'account'}})
+        for idx in range(num_hosts)
+    }
+    # Own objects, so the lookups can't shortcut by identity
+    syncer.synced_hosts.update(CountingName(f"host{idx}")
+                               for idx in range(num_deleted, num_hosts))
+    syncer.deleted = []
+    syncer.send_bulk_chunk = lambda url, method, chunk: syncer.deleted.extend(chunk)
+    return syncer
+
+
+def count_comparisons(num_hosts, num_deleted=10):
+    """
+    Hostname comparisons of one cleanup_hosts run
+    """
+    syncer = make_syncer(num_hosts, num_deleted)
+    CountingName.comparisons = 0
+    syncer.cleanup_hosts()
+    comparisons = CountingName.comparisons
+    assert sorted(syncer.deleted) == sorted(f"host{idx}" for idx in range(num_deleted))
+    return comparisons
+
+
+def test_bookkeeping_uses_sets():
+    """
+    Lookups in the Bookkeeping of the Syncer don't scan
+    """
+    syncer = SyncCMK2()
+    atexit.unregister(syncer.save_log)
+    assert isinstance(syncer.synced_hosts, set)
+    assert isinstance(syncer.existing_folders, set)
+
+
+def test_cleanup_is_linear(monkeypatch):
+    """
+    Each Host is compared about once, no matter how many there are.
+    A list lookup per Host would compare it with half of the synced Hosts.
+    """
+    monkeypatch.setitem(app.config, 'CMK_DONT_DELETE_HOSTS', False)
+    monkeypatch.setitem(app.config, 'CMK_BULK_DELETE_HOSTS', True)
+    for num_hosts in (10000, 40000):
+        comparisons = count_comparisons(num_hosts)
+        assert comparisons <= 2 * num_hosts, f"{num_hosts} Hosts: {comparisons} comparisons"
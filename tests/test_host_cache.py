@@ -0,0 +1,47 @@
+"""
+Invalidation of the Host Cache
+"""
+from bson import ObjectId
+
+from application.models import host as host_models
+from application.models.host import Host
+from application.modules.plugin import Plugin
+
+
+class StoredEntries():
+    """
+    Stands in for HostCache, with the Entries already in the Database
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def objects(self, **_kwargs):
+        """
+        Every Query returns all Entries
+        """
+        return self
+
+    def as_pymongo(self):
+        """
+        Entries as the raw Documents
+        """
+        return [{'name': name, 'data': data} for name, data in self.entries.items()]
+
+
+def test_invalidate_before_first_access(monkeypatch):
+    """
+    Label changes before the Cache is loaded hide the stale Attributes,
+    Entries with a fingerprint stay
+    """
+    monkeypatch.setattr(host_models, 'HostCache', StoredEntries({
+        'cmk_hostattribute': {'attributes': {'all': {}, 'filtered': {}},
+                              'rules_version': 'v1'},
+        'cmk_rules': {'fingerprint': 'abc', 'outcomes': {}},
+    }))
+    host = Host(id=ObjectId(), hostname='host', labels={'site': 'a'})
+
+    host.set_labels({'site': 'b'})
+
+    assert not Plugin.has_attribute_cache(host, 'cmk_hostattribute', 'v1')
+    assert host.cache['cmk_rules']['fingerprint'] == 'abc'
@@ -0,0 +1,66 @@
+"""
+Tests for the streaming JSON Parser
+"""
+import json
+import random
+
+import pytest
+
+from application.helpers.json_stream import iter_json_array
+
+
+DOCUMENTS = [
+    {"value": [1, 2.5, -3e5, 80544.59981, 1E-7, 0]},
+    {"links": [{"rel": "self"}], "value": [
+        {"id": "host1", "extensions": {"folder": "/a/b", "attributes": {
+            "ipaddress": "10.0.0.1", "labels": {"cmdb_syncer": "abc", "os": "linux"}}}},
+        {"id": "hüst2", "extensions": {"folder": "/", "is_cluster": True,
+                                       "cluster_nodes": ["a", "b"], "size": 12345.678e-2}},
+    ], "domainType": "host_config", "count": 2},
+    {"value": [True, False, None, "a \"quoted\" \\ string", [], {}, [[1], [2.0]]]},
+    {"value": []},
+]
+
+
+def split(text, *offsets):
+    """
+    Text as Chunks of Bytes, cut at the given offsets
+    """
+    data = text.encode('utf-8')
+    positions = [0, *offsets, len(data)]
+    return [data[start:end] for start, end in zip(positions, positions[1:])]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_split_at_every_offset(document, indent):
+    """
+    Every single Split gives the same Items as json.loads
+    """
+    text = json.dumps(document, indent=indent, ensure_ascii=False)
+    expected = json.loads(text)['value']
+    for offset in range(len(text.encode('utf-8')) + 1):
+        assert list(iter_json_array(split(text, offset), 'value')) == expected, offset
+
+
+def test_random_splits():
+    """
+    Many random Splits of a bigger Document
+    """
+    rnd = random.Random(42)
+    document = {"value": [{"id": f"host{i}", "number": rnd.uniform(-1e6, 1e6),
+                           "exp": rnd.random() * 10 ** rnd.randint(-30, 30),
+                           "int": rnd.randint(-10**9, 10**9)} for i in range(200)]}
+    text = json.dumps(document)
+    length = len(text)
+    for _ in range(300):
+        offsets = sorted(rnd.sample(range(1, length), rnd.randint(1, 50)))
+        assert list(iter_json_array(split(text, *offsets), 'value')) == document['value']
+
+
+def test_invalid_document():
+    """
+    Broken JSON raises ValueError
+    """
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"value": [1, 2'], 'value'))
@@ -0,0 +1,28 @@
+"""
+Fast Paths of render_jinja
+"""
+import pytest
+
+from application.helpers.syncer_jinja import render_jinja, get_environment
+
+
+@pytest.mark.parametrize('value, kwargs', [
+    ('{{ hostname }}', {'hostname': 'srv01'}),
+    ('{{ count }}', {'count': 5}),
+    ('{{ true }}', {'true': 'label'}),
+    ('{{ None }}', {'None': 'label'}),
+    ('{{ range }}', {'range': 'label'}),
+])
+def test_simple_variable_like_jinja(value, kwargs):
+    """
+    The Fast Path renders like the compiled Template
+    """
+    expected = get_environment('raise').from_string(value).render(**kwargs)
+    assert render_jinja(value, mode='raise', **kwargs) == expected
+
+
+def test_missing_variable_is_nullified():
+    """
+    Missing Variables still go through the compiled Template
+    """
+    assert render_jinja('{{ hostname }}', mode='nullify', other='srv01') == ""